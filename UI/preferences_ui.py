@@ -58,6 +58,19 @@ class PreferencesPanel(QFrame):
         inner_layout.addWidget(self.overwrite_title)
         inner_layout.addWidget(self.overwrite_check)
 
+        self.sync_title = QLabel('Sync Changed Files—')
+        self.sync_title.setObjectName("sidePanelSubTitle")
+
+        self.sync_check = QCheckBox('Only copy new or changed files')
+        self.sync_remove_check = QCheckBox('Remove files no longer in package')
+        self.sync_hash_check = QCheckBox('Compare contents (slower)')
+
+        inner_layout.addSpacing(12)
+        inner_layout.addWidget(self.sync_title)
+        inner_layout.addWidget(self.sync_check)
+        inner_layout.addWidget(self.sync_remove_check)
+        inner_layout.addWidget(self.sync_hash_check)
+
 
         content_layout.addLayout(inner_layout)
 
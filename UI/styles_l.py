@@ -120,6 +120,17 @@ QLineEdit::focus {{
     opacity: 0.75;
 }}
 
+#copyProgress {{
+    background: {BTN_BG};
+    border: none;
+    border-radius: 3px;
+    max-height: 6px;
+}}
+#copyProgress::chunk {{
+    background: {COLOR_TEXT_MUTED};
+    border-radius: 3px;
+}}
+
 
 
 /* =========================
@@ -2,7 +2,7 @@ from pathlib import Path
 
 from PyQt6.QtCore import (Qt, QPoint,
                           QUrl, QByteArray,
-                          QObject)
+                          QObject, QStringListModel)
 
 from PyQt6.QtGui import (QIcon, QAction,
                          QIntValidator)
@@ -11,7 +11,7 @@ from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel,
     QLineEdit, QCheckBox, QPushButton, QFrame,
     QSizePolicy, QGraphicsDropShadowEffect, QMessageBox,
-    QMenu, QRadioButton, QAbstractButton, QSpacerItem, QToolButton)
+    QMenu, QRadioButton, QAbstractButton, QSpacerItem, QToolButton, QCompleter, QProgressBar)
 
 from UI.preferences_ui import PreferencesPanel
 from UI.switch import QToggle
@@ -32,6 +32,9 @@ class MainUI(QWidget):
         self.version = 'new'
         self.send_email = False
         self.overwrite = False
+        self.sync_mode = False
+        self.sync_remove = False
+        self.sync_hash = False
 
         self.signed_in = False
 
@@ -112,6 +115,12 @@ class MainUI(QWidget):
         self.package_input.setFixedHeight(40)
         self.package_input.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
 
+        # Filled per job by the controller from its package index.
+        self.package_completer = QCompleter(QStringListModel(self), self)
+        self.package_completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.package_completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.package_input.setCompleter(self.package_completer)
+
         self.scan_btn = QPushButton("Scan")
         self.scan_btn.setEnabled(False)
         self.scan_btn.setSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Fixed)
@@ -200,9 +209,15 @@ class MainUI(QWidget):
         # -- Footer / Status Layout --
         self.footer_layout = QHBoxLayout()
         self.status_label = QLabel("Ready.")
+        self.copy_progress = QProgressBar()
+        self.copy_progress.setRange(0, 1000)
+        self.copy_progress.setTextVisible(False)
+        self.copy_progress.setFixedWidth(160)
+        self.copy_progress.hide()
         self.help_btn = QPushButton("Help")
         self.footer_layout.addWidget(self.status_label)
         self.footer_layout.addStretch()
+        self.footer_layout.addWidget(self.copy_progress)
         self.footer_layout.addWidget(self.help_btn)
 
         # -- Assemble All --
@@ -238,6 +253,7 @@ class MainUI(QWidget):
         self.enc_check.setObjectName("encCheckbox")
 
         self.status_label.setObjectName("statusLabel")
+        self.copy_progress.setObjectName("copyProgress")
         self.help_btn.setObjectName("helpButton")
 
     def wire_signals(self) -> None:
@@ -250,6 +266,9 @@ class MainUI(QWidget):
         self.preferences_panel.outlook_old_check.toggled.connect(self.controller.outlook__old_ui_handler)
 
         self.preferences_panel.overwrite_check.toggled.connect(self.controller.overwrite_handler)
+        self.preferences_panel.sync_check.toggled.connect(self.controller.sync_handler)
+        self.preferences_panel.sync_remove_check.toggled.connect(self.controller.sync_handler)
+        self.preferences_panel.sync_hash_check.toggled.connect(self.controller.sync_handler)
 
         self.menu_panel.about_button.clicked.connect(self.controller.about)
         self.menu_panel.about_button.clicked.connect(self.menu_panel.toggle)
@@ -263,6 +282,7 @@ class MainUI(QWidget):
 
         self.package_input.textChanged.connect(self.controller.handle_package_change)
         self.job_code_input.textChanged.connect(self.controller.handle_package_change)
+        self.package_input.textEdited.connect(self.controller.update_package_completions)
 
         self.job_code_input.inputRejected.connect(self.controller.showInvalidTooltip)
 
@@ -273,6 +293,8 @@ class MainUI(QWidget):
         self.outpath_button.clicked.connect(self.controller.browse_outpath)
         self.output_path_input.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.output_path_input.customContextMenuRequested.connect(self.controller.show_outpath_menu)
+        self.package_input.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.package_input.customContextMenuRequested.connect(self.controller.show_package_menu)
 
         self.email_toggle.toggled.connect(self.controller.handle_email_toggle)
 
@@ -305,6 +327,9 @@ class MainUI(QWidget):
         saved_outpath = SETTINGS.value("outputPath", "", type=str)
         saved_theme = SETTINGS.value("theme", "", type=str)
         saved_overwrite = SETTINGS.value("overwrite", False, type=bool)
+        saved_sync = SETTINGS.value("syncMode", False, type=bool)
+        saved_sync_remove = SETTINGS.value("syncRemove", False, type=bool)
+        saved_sync_hash = SETTINGS.value("syncHash", False, type=bool)
         saved_email_version = SETTINGS.value("emailVersion", "", type=str)
         saved_email_toggle = SETTINGS.value("sendEmail", False, type=bool)
 
@@ -329,6 +354,13 @@ class MainUI(QWidget):
             self.overwrite = saved_overwrite
             print(f"[load_ui_settings] Overwrite restored: {saved_overwrite}")
 
+        self.preferences_panel.sync_remove_check.setChecked(saved_sync_remove)
+        self.preferences_panel.sync_hash_check.setChecked(saved_sync_hash)
+        self.preferences_panel.sync_check.setChecked(saved_sync)
+        self.controller.sync_handler()
+        if saved_sync:
+            print(f"[load_ui_settings] Sync restored: remove={saved_sync_remove}, hash={saved_sync_hash}")
+
         if saved_email_version:
             if saved_email_version == "new":
                 self.preferences_panel.outlook_new_check.setChecked(True)
@@ -1,12 +1,13 @@
+import json
 import re
 import shutil
 import webbrowser
 import zipfile
-from datetime import time as pytime
+from datetime import datetime, time as pytime
 from pathlib import Path
 from typing import Optional
 
-from PyQt6.QtCore import QThreadPool, Qt, QThread, QUrl, QPoint, QSize
+from PyQt6.QtCore import QObject, QThreadPool, Qt, QThread, QTimer, QUrl, QPoint, QSize, pyqtSignal
 from PyQt6.QtWidgets import QFileDialog, QMessageBox, QMenu, QToolTip
 from PyQt6.QtGui import QDesktopServices, QAction, QIcon, QPixmap, QPainter, QPainterPath
 
@@ -15,11 +16,20 @@ from UI.help import HelpWindow
 from control.auth_controller import AuthState
 from control.profile_service import get_profile, get_photo
 from model.graph_logic import acquire_token
-from model.main_logic import find_all_files_for_marks, check_for_misses
-from model.SQL_logic import build_pkg_content_list
+from model.fs_backend import backend_from_config, set_backend
+from model.main_logic import FileDiscovery, check_for_misses, zip_tree
+from model.SQL_conn import CircuitBreaker, get_sql_backend, set_sql_backend
+from model.sql_standin import SQLiteStandIn
+from model.SQL_logic import get_pkg_contents, invalidate_pkg_contents, job_needs_hydration
+from model.package_index import PackageIndex
+from model.pkg_cache import PKG_CACHE_TTL
+from model.walker import DEFAULT_EXCLUDES, DEFAULT_WALK_WORKERS
 from model.reports import write_miss_report
 from model.settings import SETTINGS
 from workers.email_worker import EmailWorker
+from workers.hydrate_worker import HydrateWorker
+from workers.package_list_worker import PackageListWorker
+from workers.prefetch_worker import PrefetchWorker
 from workers.scan_worker import ScanWorker
 from workers.token_worker import TokenWorker
 
@@ -29,6 +39,11 @@ from UI.styles_l import style as style_L
 from UI.styles_d import style as style_D
 
 
+class _BreakerSignals(QObject):
+    """Carries circuit-breaker changes from SQL worker threads to the GUI thread."""
+    changed = pyqtSignal(str, str)
+
+
 class MainControl:
     """Main controller for JobScan UI actions and threading orchestration."""
 
@@ -43,9 +58,46 @@ class MainControl:
         # strong refs for QThread/QObject
         self._scan_thread = None
         self._scan_worker = None
+        self._hydrate_thread = None
+        self._hydrate_worker = None
+        self._pkg_list_thread = None
+        self._pkg_list_worker = None
+
+        # package autocomplete: loaded per job, once the job code stops changing
+        self._pkg_index: PackageIndex | None = None
+        self._pkg_list_job = ""
+        self._pkg_list_timer = QTimer()
+        self._pkg_list_timer.setSingleShot(True)
+        self._pkg_list_timer.setInterval(400)
+        self._pkg_list_timer.timeout.connect(self._load_package_list)
+
+        # speculative package-content prefetch while typing; only the latest inputs count
+        self._prefetch_thread = None
+        self._prefetch_worker = None
+        self._prefetched: tuple[int, str, object] | None = None
+        self._prefetch_timer = QTimer()
+        self._prefetch_timer.setSingleShot(True)
+        self._prefetch_timer.setInterval(500)
+        self._prefetch_timer.timeout.connect(self._prefetch_package)
 
         self.status = StatusManager(self.view.status_label, self._base_status)
 
+        # Dev boxes can point JobScan at a local SQLite stand-in instead of Strider/Voltron.
+        if SETTINGS.value("sqlBackend", "production", type=str) == "standin":
+            set_sql_backend(SQLiteStandIn(SETTINGS.value("sqlStandinPath", ":memory:", type=str),
+                                          latency=SETTINGS.value("sqlStandinLatency", 0.0, type=float)).backend())
+
+        self._breaker_signals = _BreakerSignals()
+        self._breaker_signals.changed.connect(self._on_breaker_change)
+        for pool in get_sql_backend().pools:
+            pool.breaker.add_listener(self._breaker_signals.changed.emit)
+
+        set_backend(backend_from_config(
+            SETTINGS.value("fsBackend", "share", type=str),
+            SETTINGS.value("ncRoot", "", type=str),
+            SETTINGS.value("drawingRoot", "", type=str),
+        ))
+
         self.view.overwrite = self.view.preferences_panel.overwrite_check.isChecked()
         self.view.version = (
             'new' if self.view.preferences_panel.outlook_new_check.isChecked()
@@ -103,6 +155,19 @@ class MainControl:
             SETTINGS.setValue("overwrite", False)
             print('Overwrite set to: False')
 
+    def sync_handler(self):
+        panel = self.view.preferences_panel
+        self.view.sync_mode = panel.sync_check.isChecked()
+        self.view.sync_remove = panel.sync_remove_check.isChecked()
+        self.view.sync_hash = panel.sync_hash_check.isChecked()
+        # Removal and hashing only apply to sync mode.
+        panel.sync_remove_check.setEnabled(self.view.sync_mode)
+        panel.sync_hash_check.setEnabled(self.view.sync_mode)
+        SETTINGS.setValue("syncMode", self.view.sync_mode)
+        SETTINGS.setValue("syncRemove", self.view.sync_remove)
+        SETTINGS.setValue("syncHash", self.view.sync_hash)
+        print(f'Sync set to: {self.view.sync_mode} (remove={self.view.sync_remove}, hash={self.view.sync_hash})')
+
 
 
     # =========================================================
@@ -122,6 +187,16 @@ class MainControl:
         job_ok = bool(job_clean)
         pkg_ok = bool(self.view.package_input.text().strip())
 
+        if job_clean != self._pkg_list_job:
+            if self._pkg_index is not None:
+                self._set_package_index(None)
+            if job_ok:
+                self._pkg_list_timer.start()
+
+        self._prefetch_timer.stop()
+        if job_ok and self._prefetch_key() is not None:
+            self._prefetch_timer.start()
+
         if job_ok and pkg_ok:
             self.view.scan_btn.setEnabled(True)
         elif job_ok:
@@ -167,6 +242,99 @@ class MainControl:
         self.status.show(f"Scanning {pkg} → {', '.join(targets)}…")
         self.scan()
 
+    def _prefetch_key(self) -> tuple[int, str] | None:
+        """(job, package) when both inputs look complete and worth a speculative fetch."""
+        job_code_str = self.view.job_code_input.text().strip()
+        pkg = self.view.package_input.text().strip().upper()
+        if not job_code_str or not re.match(r'^(SUB|PKG)#\d+$', pkg):
+            return None
+        return int(job_code_str), pkg
+
+    def _take_prefetched(self, job_code: int, package: str):
+        """Fresh contents prefetched for exactly these inputs, if any."""
+        if self._prefetched and self._prefetched[:2] == (job_code, package):
+            contents = self._prefetched[2]
+            if not contents.stale and contents.age < SETTINGS.value("pkgCacheTtl", PKG_CACHE_TTL, type=float):
+                return contents
+        return None
+
+    def _prefetch_package(self):
+        key = self._prefetch_key()
+        if key is None or self._take_prefetched(*key) is not None:
+            return
+        if self._prefetch_thread is not None:
+            return  # superseded: the running fetch re-arms the timer when it finishes
+
+        self._prefetch_thread = QThread(self.view)
+        self._prefetch_worker = PrefetchWorker(*key, SETTINGS.value("pkgCacheTtl", PKG_CACHE_TTL, type=float))
+        self._prefetch_worker.moveToThread(self._prefetch_thread)
+
+        self._prefetch_thread.started.connect(self._prefetch_worker.run)
+        self._prefetch_thread.finished.connect(self._prefetch_thread.deleteLater)
+
+        self._prefetch_worker.finished.connect(self._prefetch_thread.quit)
+        self._prefetch_worker.finished.connect(self._prefetch_worker.deleteLater)
+        self._prefetch_worker.error.connect(self._prefetch_thread.quit)
+        self._prefetch_worker.error.connect(self._prefetch_worker.deleteLater)
+
+        def _loaded(job_code: int, package: str, contents):
+            # results for inputs the user has since changed are dropped
+            if self._prefetch_key() == (job_code, package):
+                self._prefetched = (job_code, package, contents)
+                print(f"[Prefetch] {job_code} {package} ready")
+
+        def _cleanup():
+            self._prefetch_thread = None
+            self._prefetch_worker = None
+            if self._prefetch_key() not in (None, key):
+                self._prefetch_timer.start()
+
+        self._prefetch_worker.finished.connect(_loaded)
+        self._prefetch_thread.finished.connect(_cleanup)
+        self._prefetch_thread.start()
+
+    def update_package_completions(self, text: str):
+        model = self.view.package_completer.model()
+        model.setStringList(self._pkg_index.complete(text) if self._pkg_index else [])
+
+    def _set_package_index(self, index: PackageIndex | None):
+        self._pkg_index = index
+        self.update_package_completions(self.view.package_input.text())
+
+    def _load_package_list(self):
+        job_code_str = self.view.job_code_input.text().strip()
+        if not job_code_str or self._pkg_list_thread is not None:
+            return
+        self._pkg_list_job = job_code_str
+
+        self._pkg_list_thread = QThread(self.view)
+        self._pkg_list_worker = PackageListWorker(int(job_code_str),
+                                                  SETTINGS.value("pkgCacheTtl", PKG_CACHE_TTL, type=float))
+        self._pkg_list_worker.moveToThread(self._pkg_list_thread)
+
+        self._pkg_list_thread.started.connect(self._pkg_list_worker.run)
+        self._pkg_list_thread.finished.connect(self._pkg_list_thread.deleteLater)
+
+        self._pkg_list_worker.finished.connect(self._pkg_list_thread.quit)
+        self._pkg_list_worker.finished.connect(self._pkg_list_worker.deleteLater)
+        self._pkg_list_worker.error.connect(self._pkg_list_thread.quit)
+        self._pkg_list_worker.error.connect(self._pkg_list_worker.deleteLater)
+
+        def _loaded(job_code: int, packages: list):
+            if str(job_code) == self.view.job_code_input.text().strip() and packages:
+                self._set_package_index(PackageIndex(job_code, packages))
+
+        def _cleanup():
+            self._pkg_list_thread = None
+            self._pkg_list_worker = None
+            # the job code changed while loading: load the current one
+            if self.view.job_code_input.text().strip() != job_code_str:
+                self._pkg_list_timer.start()
+
+        self._pkg_list_worker.finished.connect(_loaded)
+        self._pkg_list_thread.finished.connect(_cleanup)
+        self._pkg_list_thread.start()
+
     def browse_outpath(self):
         prior = self.view.output_path_input.text().strip()
         start_dir = prior or str(Path.home() / "Desktop")
@@ -206,6 +374,34 @@ class MainControl:
 
         menu.exec(self.view.output_path_input.mapToGlobal(pos))
 
+    def show_package_menu(self, pos: QPoint) -> None:
+        menu: QMenu = self.view.package_input.createStandardContextMenu()
+        menu.addSeparator()
+
+        job_code = self.view.job_code_input.text().strip()
+        package = self.view.package_input.text().strip().upper()
+
+        refresh_action = QAction("Refresh Package Data", self.view)
+        refresh_action.triggered.connect(lambda: self._invalidate_package(job_code, package))
+        refresh_action.setEnabled(bool(job_code and package))
+        menu.addAction(refresh_action)
+
+        clear_action = QAction("Clear Package Cache", self.view)
+        clear_action.triggered.connect(lambda: self._invalidate_package(None, None))
+        menu.addAction(clear_action)
+
+        menu.exec(self.view.package_input.mapToGlobal(pos))
+
+    def _invalidate_package(self, job_code: str | None, package: str | None):
+        invalidate_pkg_contents(int(job_code) if job_code else None, package)
+        self._prefetched = None
+        self._pkg_list_job = ""
+        self._set_package_index(None)
+        if job_code:
+            self.status.show(f"Package data for {job_code} {package} will be reloaded on the next scan.")
+        else:
+            self.status.show("Package cache cleared.")
+
     def help(self):
         help_window = HelpWindow(self.view.style, self.view)
         help_window.show()
@@ -408,8 +604,10 @@ class MainControl:
             return
 
         self.status.show("Loading package data…")
+        cache_ttl = SETTINGS.value("pkgCacheTtl", PKG_CACHE_TTL, type=float)
         try:
-            mainmarks, parts = build_pkg_content_list(job_code, package)
+            contents = self._take_prefetched(job_code, package) or get_pkg_contents(job_code, package, ttl=cache_ttl)
+            mainmarks, parts = contents.mainmarks, contents.parts
 
             if not mainmarks and not parts:
                 self.status.show("No marks found for this package.")
@@ -424,16 +622,35 @@ class MainControl:
             self.status.show(f"[SQL Error] {e}")
             return
         print("[MainThread] SQL data loaded successfully")
-
-        all_files = find_all_files_for_marks(job_code, mainmarks, parts)
-        print("[MainThread] Files found", all_files)
+        self._stale_note = ""
+        if contents.stale:
+            fetched = datetime.fromtimestamp(contents.fetched_at).strftime("%b %d %H:%M")
+            self._stale_note = (f"STALE: the databases could not be reached, so the package contents "
+                                f"cached on {fetched} were used. Recent package changes may be missing.")
+            self.status.show(f"Databases unreachable - using cached package data from {fetched} (stale)")
 
         if getattr(self, "_scan_thread", None) and self._scan_thread.isRunning():
             self.status.show("Scan already in progress…")
             return
 
+        if not contents.stale and job_needs_hydration(job_code, cache_ttl):
+            self._hydrate_job(job_code)
+
+        # Discovery runs lazily on the worker thread; copying starts with the first match.
+        use_index = SETTINGS.value("useFileIndex", True, type=bool)
+        walk_workers = SETTINGS.value("walkWorkers", DEFAULT_WALK_WORKERS, type=int)
+        probe = SETTINGS.value("probeFirst", False, type=bool)
+        exclude = SETTINGS.value("walkExcludes", list(DEFAULT_EXCLUDES), type=list)
+        max_depth = SETTINGS.value("walkMaxDepth", -1, type=int)
+        discovery = FileDiscovery(job_code, mainmarks, parts, use_index=use_index,
+                                  walk_workers=walk_workers, targets=targets,
+                                  probe=probe, probe_templates=self._probe_templates(),
+                                  exclude=exclude, max_depth=max_depth if max_depth >= 0 else None)
+
         self._scan_thread = QThread(self.view)
-        self._scan_worker = ScanWorker(targets, self.export_root, all_files, overwrite=self.view.overwrite)
+        self._scan_worker = ScanWorker(targets, self.export_root, overwrite=self.view.overwrite, discovery=discovery,
+                                       sync=self.view.sync_mode, remove_stale=self.view.sync_remove,
+                                       verify_hash=self.view.sync_hash)
         self._scan_worker.moveToThread(self._scan_thread)
         print("[ScanWorker] Worker moved to thread")
 
@@ -445,6 +662,10 @@ class MainControl:
         self._scan_worker.error.connect(self._scan_thread.quit)
         self._scan_worker.error.connect(self._scan_worker.deleteLater)
 
+        self._scan_worker.msg.connect(lambda m: self.status.show(m, auto_revert=False))
+        self._scan_worker.progress.connect(self._on_copy_progress)
+        self._scan_worker.finished.connect(self.view.copy_progress.hide)
+        self._scan_worker.error.connect(self.view.copy_progress.hide)
         self._scan_worker.finished.connect(self.status.show)
         self._scan_worker.error.connect(self.status.show)
 
@@ -453,12 +674,39 @@ class MainControl:
             self._scan_thread = None
             self._scan_worker = None
 
+        self._scan_job = job_code
+        self._scan_report = None
+        self._scan_worker.report.connect(self._on_scan_report)
         self._scan_worker.finished.connect(self._post_scan_final)
         self._scan_thread.finished.connect(_cleanup)
 
         self._scan_thread.start()
         print("[ScanWorker] Thread started")
 
+    def _hydrate_job(self, job_code: int):
+        """Cache every package of the job in the background so the next package loads instantly."""
+        if self._hydrate_thread is not None:
+            return
+
+        self._hydrate_thread = QThread(self.view)
+        self._hydrate_worker = HydrateWorker(job_code)
+        self._hydrate_worker.moveToThread(self._hydrate_thread)
+
+        self._hydrate_thread.started.connect(self._hydrate_worker.run)
+        self._hydrate_thread.finished.connect(self._hydrate_thread.deleteLater)
+
+        self._hydrate_worker.finished.connect(self._hydrate_thread.quit)
+        self._hydrate_worker.finished.connect(self._hydrate_worker.deleteLater)
+        self._hydrate_worker.error.connect(self._hydrate_thread.quit)
+        self._hydrate_worker.error.connect(self._hydrate_worker.deleteLater)
+
+        def _cleanup():
+            self._hydrate_thread = None
+            self._hydrate_worker = None
+
+        self._hydrate_thread.finished.connect(_cleanup)
+        self._hydrate_thread.start()
+
     # =========================================================
     # File operations
     # =========================================================
@@ -483,12 +731,10 @@ class MainControl:
         if path.is_dir():
             target_zip = path / f"{path.name}.zip"
             tmp_zip = path.parent / f"{path.name}.zip"
-            base_name = str(tmp_zip.with_suffix(""))
 
         else:
             target_zip = path.parent / f"{path.stem}.zip"
             tmp_zip = target_zip
-            base_name = str(tmp_zip.with_suffix(""))
 
         if target_zip.exists():
             if overwrite:
@@ -520,12 +766,7 @@ class MainControl:
 
         try:
             if path.is_dir():
-                shutil.make_archive(
-                    base_name,
-                    "zip",
-                    root_dir=str(path.parent),
-                    base_dir=str(path.name),
-                )
+                zip_tree(path, tmp_zip)
 
                 try:
                     tmp_zip.replace(target_zip)
@@ -658,6 +899,17 @@ class MainControl:
     def _sanitize(self, name: str) -> str:
         return re.sub(r'[<>:"/\\|?*]', '-', name).strip()
 
+    def _probe_templates(self) -> dict[str, list[str]] | None:
+        """Per-category probe templates saved as JSON, or None for the defaults."""
+        raw = SETTINGS.value("probeTemplates", "", type=str)
+        if not raw:
+            return None
+        try:
+            return {cat: list(tpls) for cat, tpls in json.loads(raw).items()}
+        except Exception as e:
+            print(f"[Controller] Ignoring invalid probeTemplates setting: {e}")
+            return None
+
     def _show_popout(self, title: str, msg: str, msg_type: str = 'info'):
         if msg_type == 'info':
             QMessageBox.information(self.view, title, msg)
@@ -671,9 +923,17 @@ class MainControl:
     def _base_status(self):
         job_ok = bool(self.view.job_code_input.text().strip())
         pkg_ok = bool(self.view.package_input.text().strip())
-        if job_ok and pkg_ok: return "Ready."
-        if job_ok: return "Enter a package to begin."
-        return "Enter a job code to begin."
+        offline = [p.name for p in get_sql_backend().pools if p.breaker.state == CircuitBreaker.OPEN]
+        suffix = f"  ({' and '.join(offline)} offline)" if offline else ""
+        if job_ok and pkg_ok: return "Ready." + suffix
+        if job_ok: return "Enter a package to begin." + suffix
+        return "Enter a job code to begin." + suffix
+
+    def _on_breaker_change(self, name: str, state: str):
+        if state == CircuitBreaker.OPEN:
+            self.status.show(f"{name} is unreachable. Retrying in the background.")
+        else:
+            self.status.show(f"{name} is reachable again.")
 
     def _circular_pixmap(self, src: QPixmap, size: int = 28) -> QPixmap:
         src = src.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatioByExpanding,
@@ -694,16 +954,47 @@ class MainControl:
     # =========================================================
     # Post-scan finalize
     # =========================================================
+    def _on_copy_progress(self, progress):
+        if progress.fraction is None:
+            self.view.copy_progress.setRange(0, 0)  # busy indicator until every file is known
+            self.view.copy_progress.setToolTip(f"{progress.files_done} files copied so far")
+        else:
+            self.view.copy_progress.setRange(0, 1000)
+            self.view.copy_progress.setValue(int(progress.fraction * 1000))
+            self.view.copy_progress.setToolTip(f"{progress.files_done} of {progress.files_total} files")
+        self.view.copy_progress.show()
+
+    def _on_scan_report(self, misses: dict, failed_paths: list, walk_errors: int):
+        self._scan_report = (misses, failed_paths, walk_errors)
+
     def _post_scan_final(self, *_):
+        if self._scan_report is not None:
+            misses, failed_paths, walk_errors = self._scan_report
+            try:
+                write_miss_report(self.export_root, self._scan_job, misses, failed_paths, walk_errors)
+            except Exception as e:
+                print(f"[Controller] Could not write miss report: {e}")
+            if walk_errors:
+                self.status.show(f"{walk_errors} folder(s) could not be read; see JobScan_Miss_Report.txt")
+            elif failed_paths:
+                self.status.show(f"{len(failed_paths)} file(s) failed to copy; see JobScan_Miss_Report.txt")
+
         self.open_content()
 
-        zip_path = self.zip_content(self.export_root, overwrite=self.view.overwrite)
+        # A sync can change the folder without overwrite, so the zip is rebuilt.
+        zip_path = self.zip_content(self.export_root, overwrite=self.view.overwrite or self.view.sync_mode)
         if zip_path:
-            if self.view.overwrite:
-                self._show_popout('Scan Complete', f'Scan complete. Exported to: {self.export_root}\n\n'
-                                                   f'Overwrote existing files.', 'info')
+            stale_note = getattr(self, "_stale_note", "")
+            if self.view.sync_mode:
+                msg = f'Scan complete. Exported to: {self.export_root}\n\nSynced new and changed files.'
+            elif self.view.overwrite:
+                msg = f'Scan complete. Exported to: {self.export_root}\n\nOverwrote existing files.'
+            else:
+                msg = f'Scan complete. Exported to: {self.export_root}\n'
+            if stale_note:
+                self._show_popout('Scan Complete', f'{msg}\n{stale_note}', 'warning')
             else:
-                self._show_popout('Scan Complete', f'Scan complete. Exported to: {self.export_root}\n')
+                self._show_popout('Scan Complete', msg, 'info')
 
             if self.view.send_email:
                 self.handle_email(zip_path)
@@ -1,9 +1,26 @@
+import atexit
+import threading
+import time
+from collections import deque
+
 import mysql.connector
 import pyodbc
 
+POOL_MAX_SIZE = 4
+POOL_IDLE_TIMEOUT = 300.0
+POOL_CHECKOUT_TIMEOUT = 30.0
+# Connections handed back within this many seconds are reused without a ping.
+POOL_PING_AFTER = 5.0
 
+CONNECT_TIMEOUT = 5
+QUERY_TIMEOUT = 60
 
-def get_mysql_conn():
+# Consecutive connect failures that open a backend's circuit, and how long it stays open.
+BREAKER_THRESHOLD = 2
+BREAKER_COOLDOWN = 30.0
+
+
+def _connect_mysql():
     return mysql.connector.connect(
         host="Strider",
         user="admin",
@@ -11,15 +28,317 @@ def get_mysql_conn():
         database="fabrication",
         autocommit=True,
         use_pure=True,
+        connection_timeout=CONNECT_TIMEOUT,
+        # connection_timeout only covers the handshake; without these a hung query holds its pool slot forever.
+        read_timeout=QUERY_TIMEOUT,
+        write_timeout=QUERY_TIMEOUT,
     )
 
-def get_ms_sql_conn():
-    return pyodbc.connect(
+def _connect_ms_sql():
+    conn = pyodbc.connect(
         "DRIVER={ODBC Driver 17 for SQL Server};"
         "SERVER=Voltron,1433;"
         "DATABASE=MFC_NTLIVE;"
         "UID=SA;"
         "PWD=MetFab$;"
         "TrustServerCertificate=yes;",
-        autocommit=True
+        autocommit=True,
+        timeout=CONNECT_TIMEOUT,
     )
+    conn.timeout = QUERY_TIMEOUT
+    return conn
+
+
+def _mysql_alive(conn) -> bool:
+    try:
+        conn.ping(reconnect=False)
+        return True
+    except Exception:
+        return False
+
+def _ms_sql_alive(conn) -> bool:
+    try:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT 1").fetchone()
+        finally:
+            cursor.close()
+        return True
+    except Exception:
+        return False
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised without touching the network while a backend's circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Per-backend circuit breaker for connects.
+
+    After `threshold` consecutive connect failures the circuit opens: every
+    checkout fails immediately with CircuitOpenError instead of waiting on a
+    dead host. A background thread probes the server every `cooldown` seconds
+    and closes the circuit on the first successful connect. Listeners are
+    called with (name, state) on every state change, from whichever thread
+    caused it.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+
+    def __init__(self, name: str, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.last_error: BaseException | None = None
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def _notify(self):
+        for callback in list(self._listeners):
+            try:
+                callback(self.name, self.state)
+            except Exception as e:
+                print(f"[SQL_conn] breaker listener failed :: {e}")
+
+    def check(self):
+        if self.state == self.OPEN:
+            wait = max(0.0, self.cooldown - (time.monotonic() - self._opened_at))
+            raise CircuitOpenError(f"{self.name} unreachable ({self.last_error}); next retry in {wait:.0f}s")
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            changed = self.state != self.CLOSED
+            self.state = self.CLOSED
+        if changed:
+            print(f"[SQL_conn] {self.name} reachable again")
+            self._notify()
+
+    def record_failure(self, exc: BaseException, probe) -> None:
+        with self._lock:
+            self._failures += 1
+            self.last_error = exc
+            opened = self.state == self.CLOSED and self._failures >= self.threshold
+            if opened:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+        if opened:
+            print(f"[SQL_conn] {self.name} circuit open after {self._failures} failures :: {exc}")
+            threading.Thread(target=self._probe_until_closed, args=(probe,),
+                             name=f"probe-{self.name}", daemon=True).start()
+            self._notify()
+
+    def _probe_until_closed(self, probe):
+        while self.state == self.OPEN:
+            time.sleep(self.cooldown)
+            try:
+                probe()
+            except Exception as e:
+                with self._lock:
+                    self.last_error = e
+                    self._opened_at = time.monotonic()
+                continue
+            self.record_success()
+
+
+class PooledConnection:
+    """
+    A checked-out connection. Behaves like the driver connection it wraps;
+    close() or leaving a `with` block hands it back to the pool instead of
+    closing the socket. A connection whose `with` block raised is discarded.
+    """
+
+    def __init__(self, pool: "ConnectionPool", raw):
+        self._pool = pool
+        self._raw = raw
+
+    def __getattr__(self, name):
+        raw = self.__dict__.get("_raw")
+        if raw is None:
+            raise AttributeError(f"{name!r}: connection was already returned to the {self._pool.name} pool")
+        return getattr(raw, name)
+
+    def __setattr__(self, name, value):
+        if name.startswith("_"):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._raw, name, value)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._release(reusable=exc_type is None)
+        return False
+
+    def __del__(self):
+        try:
+            self._release(reusable=False)
+        except Exception:
+            pass
+
+    def close(self):
+        self._release(reusable=True)
+
+    def _release(self, reusable: bool):
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool._checkin(raw, reusable)
+
+
+class ConnectionPool:
+    """
+    Process-wide pool of warm connections to one server.
+
+    At most `max_size` connections are open or checked out at once; further
+    checkouts wait up to `checkout_timeout` seconds. Idle connections are
+    reused newest-first, pinged before reuse if they sat for more than
+    `ping_after` seconds, and closed once idle for `idle_timeout` seconds.
+    """
+
+    def __init__(self, name: str, connect, is_alive, breaker: CircuitBreaker | None = None,
+                 max_size: int = POOL_MAX_SIZE,
+                 idle_timeout: float = POOL_IDLE_TIMEOUT, checkout_timeout: float = POOL_CHECKOUT_TIMEOUT,
+                 ping_after: float = POOL_PING_AFTER):
+        self.name = name
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self.ping_after = ping_after
+        self._connect = connect
+        self._is_alive = is_alive
+        self.breaker = breaker or CircuitBreaker(name)
+        self._idle: deque[tuple[object, float]] = deque()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+
+    def acquire(self) -> PooledConnection:
+        self.breaker.check()
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            raise TimeoutError(f"{self.name} pool exhausted: {self.max_size} connections in use")
+        try:
+            self._evict_expired()
+            raw = self._reuse_idle()
+            if raw is None:
+                raw = self._open()
+        except BaseException:
+            self._slots.release()
+            raise
+        return PooledConnection(self, raw)
+
+    def _open(self):
+        try:
+            raw = self._connect()
+        except Exception as e:
+            self.breaker.record_failure(e, self._probe)
+            raise
+        self.breaker.record_success()
+        print(f"[SQL_conn] Opened {self.name} connection")
+        return raw
+
+    def _probe(self):
+        """Background reconnect attempt. The connection is closed again so max_size still holds."""
+        self._close(self._connect())
+
+    def _reuse_idle(self):
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                raw, returned_at = self._idle.pop()
+            if time.monotonic() - returned_at <= self.ping_after or self._is_alive(raw):
+                return raw
+            print(f"[SQL_conn] Dropping dead {self.name} connection")
+            self._close(raw)
+
+    def _evict_expired(self):
+        cutoff = time.monotonic() - self.idle_timeout
+        expired = []
+        with self._lock:
+            while self._idle and self._idle[0][1] < cutoff:
+                expired.append(self._idle.popleft()[0])
+        for raw in expired:
+            self._close(raw)
+
+    def _checkin(self, raw, reusable: bool):
+        try:
+            if reusable:
+                with self._lock:
+                    self._idle.append((raw, time.monotonic()))
+            else:
+                self._close(raw)
+        finally:
+            self._slots.release()
+
+    @staticmethod
+    def _close(raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def clear(self):
+        """Close every idle connection."""
+        with self._lock:
+            idle = [raw for raw, _ in self._idle]
+            self._idle.clear()
+        for raw in idle:
+            self._close(raw)
+
+
+MYSQL_POOL = ConnectionPool("MySQL", _connect_mysql, _mysql_alive)
+MS_SQL_POOL = ConnectionPool("SQL Server", _connect_ms_sql, _ms_sql_alive)
+
+atexit.register(MYSQL_POOL.clear)
+atexit.register(MS_SQL_POOL.clear)
+
+
+class SQLBackend:
+    """
+    Where build_pkg_content_list gets its connections: one pool per server.
+    The default talks to Strider (MySQL) and Voltron (SQL Server); a stand-in
+    backend swaps in other pools without changing the query code.
+    """
+
+    def __init__(self, name: str, mysql_pool: ConnectionPool, ms_sql_pool: ConnectionPool):
+        self.name = name
+        self.mysql_pool = mysql_pool
+        self.ms_sql_pool = ms_sql_pool
+
+    def __repr__(self):
+        return f"SQLBackend({self.name!r})"
+
+    @property
+    def pools(self) -> tuple[ConnectionPool, ConnectionPool]:
+        return self.mysql_pool, self.ms_sql_pool
+
+
+PRODUCTION = SQLBackend("production", MYSQL_POOL, MS_SQL_POOL)
+
+_sql_backend = PRODUCTION
+_sql_backend_lock = threading.Lock()
+
+
+def get_sql_backend() -> SQLBackend:
+    with _sql_backend_lock:
+        return _sql_backend
+
+def set_sql_backend(backend: SQLBackend):
+    global _sql_backend
+    with _sql_backend_lock:
+        _sql_backend = backend
+    print(f"[SQL_conn] Using {backend!r}")
+
+
+def get_mysql_conn():
+    return get_sql_backend().mysql_pool.acquire()
+
+def get_ms_sql_conn():
+    return get_sql_backend().ms_sql_pool.acquire()
@@ -1,9 +1,46 @@
+import time
+from collections.abc import Iterable
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+
 from model.SQL_conn import (get_mysql_conn, get_ms_sql_conn)
+from model.pkg_cache import PKG_CACHE_TTL, PackageContents, get_pkg_cache
+
+SQL_TIMEOUT = 60.0
+# Rows pulled per fetchmany() call when streaming a result set.
+FETCH_BATCH = 500
+
+MS_SQL = "SQL Server"
+MYSQL = "MySQL"
+
+# fabtracker.getparts column that names the package when called for a whole job.
+PACKAGE_COLUMNS = ("package", "pkg", "packagename", "package_name")
+_BATCH_MARKER = "jobscan_batch"
+# Packages per multi-statement round trip in batched lookups.
+BATCH_SIZE = 50
+
+
+class PackageQueryError(Exception):
+    """One or both package lookups failed; `errors` maps backend name -> exception."""
 
-def _extract_marks_from_current_set(cursor, idx=5):
-    """Read current result set, return normalized set of marks from column idx."""
-    rows = cursor.fetchall()
-    return {str(row[idx]).strip() for row in rows}
+    def __init__(self, errors: dict[str, BaseException]):
+        self.errors = errors
+        super().__init__("; ".join(f"{name}: {err}" for name, err in errors.items()))
+
+
+def _iter_rows(cursor, batch: int = FETCH_BATCH):
+    """Stream the current result set in fetchmany batches."""
+    while True:
+        rows = cursor.fetchmany(batch)
+        if not rows:
+            return
+        yield from rows
+
+def _extract_marks_from_current_set(cursor, idx=5, into: set[str] | None = None):
+    """Stream current result set, adding normalized marks from column idx to a set."""
+    marks = set() if into is None else into
+    for row in _iter_rows(cursor):
+        marks.add(str(row[idx]).strip())
+    return marks
 
 def _drain_all_remaining_sets(cursor):
     try:
@@ -12,36 +49,271 @@ def _drain_all_remaining_sets(cursor):
     except Exception:
         pass
 
-def build_pkg_content_list(job_code: int, pkg_code: str):
-    with get_ms_sql_conn() as msconn, get_mysql_conn() as mysqlconn:
-
+def _query_ms_sql_parts(job_code: int, pkg_code: str) -> list[str]:
+    with get_ms_sql_conn() as msconn:
         with msconn.cursor() as mscursor:
             mscursor.execute("EXEC fabtracker.getparts ?, ?, null", (job_code, pkg_code))
-            parts = sorted({str(row[5]).strip() for row in mscursor.fetchall()})
+            return sorted(_extract_marks_from_current_set(mscursor, idx=5))
 
-        with mysqlconn.cursor() as mysqlcursor:
-            mysqlcursor.execute("CALL fabrication.MFC_GetMain_InPackage(%s, %s)", (job_code, pkg_code))
-            main_marks = sorted(_extract_marks_from_current_set(mysqlcursor, idx=5))
-            _drain_all_remaining_sets(mysqlcursor)
+def _query_mysql_parts(mysqlcursor, job_code: int, pkg_code: str) -> list[str]:
+    used_stored = False
+    parts: set[str] = set()
+    try:
+        mysqlcursor.callproc("fabrication.MFC_GetParts_InPackage", (job_code, pkg_code))
+        if hasattr(mysqlcursor, "stored_results"):
+            for rs in mysqlcursor.stored_results():
+                _extract_marks_from_current_set(rs, idx=6, into=parts)
+            used_stored = True
+    except Exception:
+        pass
+
+    if not used_stored:
+        parts.clear()
+        mysqlcursor.execute("CALL fabrication.MFC_GetParts_InPackage(%s, %s)", (job_code, pkg_code))
+        _extract_marks_from_current_set(mysqlcursor, idx=6, into=parts)
+        _drain_all_remaining_sets(mysqlcursor)
+
+    return sorted(parts)
+
+def _query_mysql(main_query, fallback_query, main_out: Future, ms_result: Future, deadline: float):
+    """
+    Run `main_query(cursor)` on MySQL and publish its result on `main_out`; then,
+    once SQL Server has answered, run `fallback_query(cursor, sql server result)`
+    on the same connection and return what it returns.
+    """
+    try:
+        with get_mysql_conn() as mysqlconn:
+            with mysqlconn.cursor() as mysqlcursor:
+                main_out.set_result(main_query(mysqlcursor))
 
-            if not parts:
-                used_stored = False
                 try:
-                    mysqlcursor.callproc("fabrication.MFC_GetParts_InPackage", (job_code, pkg_code))
-                    rows = []
-                    if hasattr(mysqlcursor, "stored_results"):
-                        for rs in mysqlcursor.stored_results():
-                            rows.extend(rs.fetchall())
-                        used_stored = True
+                    ms = ms_result.result(timeout=max(0.0, deadline - time.monotonic()))
                 except Exception:
-                    pass
+                    # SQL Server failed or timed out; that is reported as its own error.
+                    return None
+                return fallback_query(mysqlcursor, ms)
+    except Exception as e:
+        if not main_out.done():
+            main_out.set_exception(e)
+        raise
+
+def _wait(fut: Future, deadline: float, timeout: float):
+    try:
+        return fut.result(timeout=max(0.0, deadline - time.monotonic()))
+    except FutureTimeout:
+        raise TimeoutError(f"no response after {timeout:g}s") from None
+
+def _query_both(ms_query, main_query, fallback_query, timeout: float):
+    """
+    Run `ms_query()` on SQL Server and `main_query` on MySQL concurrently, then
+    `fallback_query` on the MySQL connection once SQL Server's result is in.
+    Returns (sql server result, mysql main result, fallback result); raises
+    PackageQueryError naming each backend that failed or exceeded `timeout`.
+    """
+    deadline = time.monotonic() + timeout
+    main_out = Future()
+    pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="pkg-sql")
+    try:
+        ms_future = pool.submit(ms_query)
+        my_future = pool.submit(_query_mysql, main_query, fallback_query, main_out, ms_future, deadline)
+
+        errors = {}
+        ms = main = fallback = None
+        try:
+            ms = _wait(ms_future, deadline, timeout)
+        except Exception as e:
+            errors[MS_SQL] = e
+        try:
+            main = _wait(main_out, deadline, timeout)
+            if not errors:
+                fallback = _wait(my_future, deadline, timeout)
+        except Exception as e:
+            errors[MYSQL] = e
+    finally:
+        # Don't block on a hung query; its connection is returned when it finishes.
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    if errors:
+        for name, err in errors.items():
+            print(f"[SQL] {name} failed :: {err}")
+        raise PackageQueryError(errors)
+    return ms, main, fallback
 
-                if not used_stored:
-                    mysqlcursor.execute("CALL fabrication.MFC_GetParts_InPackage(%s, %s)", (job_code, pkg_code))
-                    rows = mysqlcursor.fetchall()
-                    _drain_all_remaining_sets(mysqlcursor)
+def build_pkg_content_list(job_code: int, pkg_code: str, timeout: float = SQL_TIMEOUT):
+    """
+    Return (main marks, parts) for a package.
+
+    The SQL Server parts query and the MySQL main-mark query run concurrently;
+    the MySQL parts fallback only runs when SQL Server returned no parts. If
+    either backend fails or exceeds `timeout`, PackageQueryError is raised
+    with the error for each backend that failed.
+    """
+    def main_query(mysqlcursor):
+        mysqlcursor.execute("CALL fabrication.MFC_GetMain_InPackage(%s, %s)", (job_code, pkg_code))
+        main_marks = sorted(_extract_marks_from_current_set(mysqlcursor, idx=5))
+        _drain_all_remaining_sets(mysqlcursor)
+        return main_marks
+
+    def fallback_query(mysqlcursor, parts):
+        return None if parts else _query_mysql_parts(mysqlcursor, job_code, pkg_code)
+
+    parts, main_marks, fallback_parts = _query_both(lambda: _query_ms_sql_parts(job_code, pkg_code),
+                                                    main_query, fallback_query, timeout)
+    return main_marks, parts or fallback_parts or []
+
+def _run_batch(cursor, call: str, placeholder: str, pairs: list[tuple[int, str]], idx: int,
+               batch_size: int = BATCH_SIZE) -> dict[tuple[int, str], list[str]]:
+    """
+    Run `call` (taking job, package) for every pair, `batch_size` pairs per
+    multi-statement round trip, and return the marks in column `idx` per pair.
+
+    Each call is preceded by a one-row marker SELECT carrying the pair's
+    position, so result sets can be attributed even though a call may return
+    several; as in the single-package path, only the first one is read.
+    """
+    found: dict[tuple[int, str], list[str]] = {}
+    for start in range(0, len(pairs), batch_size):
+        statements, params = [], []
+        for i, (job_code, pkg_code) in enumerate(pairs[start:start + batch_size], start):
+            statements.append(f"SELECT {placeholder} AS {_BATCH_MARKER}")
+            statements.append(call)
+            params.extend((i, job_code, pkg_code))
+        cursor.execute(";\n".join(statements), params)
+
+        current = None
+        while True:
+            if cursor.description:
+                if cursor.description[0][0] == _BATCH_MARKER:
+                    current = pairs[int(cursor.fetchall()[0][0])]
+                elif current is not None and current not in found:
+                    found[current] = sorted(_extract_marks_from_current_set(cursor, idx=idx))
+                else:
+                    for _ in _iter_rows(cursor):
+                        pass
+            if not cursor.nextset():
+                break
+    return found
+
+def build_pkg_content_lists(pairs: Iterable[tuple[int, str]],
+                            timeout: float = SQL_TIMEOUT) -> dict[tuple[int, str], tuple[list[str], list[str]]]:
+    """
+    Return {(job, package): (main marks, parts)} for many packages at once.
+
+    Each backend uses one connection and batched round trips for all pairs,
+    both backends run concurrently, and the MySQL parts fallback is batched
+    for just the packages SQL Server had no parts for. Package codes are
+    upper-cased in the keys. Errors are raised as in build_pkg_content_list.
+    """
+    keys = list(dict.fromkeys((int(job), str(pkg).strip().upper()) for job, pkg in pairs))
+    if not keys:
+        return {}
+
+    def ms_query():
+        with get_ms_sql_conn() as msconn:
+            with msconn.cursor() as mscursor:
+                return _run_batch(mscursor, "EXEC fabtracker.getparts ?, ?, null", "?", keys, idx=5)
+
+    def main_query(mysqlcursor):
+        return _run_batch(mysqlcursor, "CALL fabrication.MFC_GetMain_InPackage(%s, %s)", "%s", keys, idx=5)
+
+    def fallback_query(mysqlcursor, parts):
+        missing = [key for key in keys if not parts.get(key)]
+        if not missing:
+            return {}
+        return _run_batch(mysqlcursor, "CALL fabrication.MFC_GetParts_InPackage(%s, %s)", "%s", missing, idx=6)
+
+    parts, mains, fallback = _query_both(ms_query, main_query, fallback_query, timeout)
+    print(f"[SQL] Loaded {len(keys)} packages in bulk")
+    return {key: (mains.get(key, []), parts.get(key) or fallback.get(key, [])) for key in keys}
+
+def _column_index(description, names: tuple[str, ...]) -> int | None:
+    for i, col in enumerate(description or ()):
+        if str(col[0]).strip().lower() in names:
+            return i
+    return None
+
+def _query_ms_sql_job_parts(job_code: int) -> dict[str, list[str]]:
+    """Parts of every package of a job from one fabtracker.getparts call, keyed by package."""
+    with get_ms_sql_conn() as msconn:
+        with msconn.cursor() as mscursor:
+            mscursor.execute("EXEC fabtracker.getparts ?, null, null", (job_code,))
+            pkg_idx = _column_index(mscursor.description, PACKAGE_COLUMNS)
+            if pkg_idx is None:
+                raise LookupError("fabtracker.getparts returned no package column")
+            by_pkg: dict[str, set[str]] = {}
+            for row in _iter_rows(mscursor):
+                by_pkg.setdefault(str(row[pkg_idx]).strip().upper(), set()).add(str(row[5]).strip())
+    return {pkg: sorted(parts) for pkg, parts in by_pkg.items()}
+
+def hydrate_job(job_code: int) -> dict[str, tuple[list[str], list[str]]]:
+    """
+    Load (main marks, parts) for every package of a job and store them in the
+    package cache, with one query on SQL Server and batched round trips on
+    MySQL. Packages are discovered from the SQL Server parts listing plus the
+    ones already cached for the job, which keeps packages SQL Server has no
+    parts for; their parts come from the MySQL fallback.
+    """
+    parts_by_pkg = _query_ms_sql_job_parts(job_code)
+    cache = get_pkg_cache()
+    packages = sorted(set(parts_by_pkg).union(cache.packages(job_code) if cache else ()))
+    missing = [(job_code, pkg) for pkg in packages if not parts_by_pkg.get(pkg)]
+    with get_mysql_conn() as mysqlconn:
+        with mysqlconn.cursor() as mysqlcursor:
+            mains = _run_batch(mysqlcursor, "CALL fabrication.MFC_GetMain_InPackage(%s, %s)", "%s",
+                               [(job_code, pkg) for pkg in packages], idx=5)
+            fallback = _run_batch(mysqlcursor, "CALL fabrication.MFC_GetParts_InPackage(%s, %s)", "%s",
+                                  missing, idx=6) if missing else {}
+
+    contents = {pkg: (mains.get((job_code, pkg), []), parts_by_pkg.get(pkg) or fallback.get((job_code, pkg), []))
+                for pkg in packages}
+    if cache:
+        cache.put_job(job_code, contents)
+    print(f"[SQL] Hydrated job {job_code}: {len(contents)} packages")
+    return contents
+
+def job_needs_hydration(job_code: int, ttl: float = PKG_CACHE_TTL) -> bool:
+    cache = get_pkg_cache()
+    if cache is None:
+        return False
+    age = cache.job_age(job_code)
+    return age is None or age >= ttl
+
+def list_job_packages(job_code: int, ttl: float = PKG_CACHE_TTL) -> list[str]:
+    """Package names of a job, from the cache if the job was loaded within `ttl`, else by hydrating it."""
+    cache = get_pkg_cache()
+    if cache and not job_needs_hydration(job_code, ttl):
+        return cache.packages(job_code)
+    return sorted(hydrate_job(job_code))
+
+def get_pkg_contents(job_code: int, pkg_code: str, ttl: float = PKG_CACHE_TTL,
+                     refresh: bool = False) -> PackageContents:
+    """
+    Cached build_pkg_content_list.
+
+    A cached entry younger than `ttl` seconds is returned without touching SQL
+    (unless `refresh`). Otherwise the databases are queried and the cache is
+    updated; if that fails and an older entry exists, it is returned with
+    `stale=True` instead of raising.
+    """
+    cache = get_pkg_cache()
+    cached = cache.get(job_code, pkg_code) if cache else None
+    if cached and not refresh and cached.age < ttl:
+        print(f"[SQL] Using cached contents for {job_code} {pkg_code} ({cached.age:.0f}s old)")
+        return cached
+
+    try:
+        mainmarks, parts = build_pkg_content_list(job_code, pkg_code)
+    except Exception as e:
+        if cached is None:
+            raise
+        print(f"[SQL] Serving stale contents for {job_code} {pkg_code} :: {e}")
+        return cached._replace(stale=True)
 
-                if rows:
-                    parts = sorted({str(r[6]).strip() for r in rows})
+    if cache is None:
+        return PackageContents(mainmarks, parts, time.time())
+    return cache.put(job_code, pkg_code, mainmarks, parts)
 
-    return main_marks, parts
\ No newline at end of file
+def invalidate_pkg_contents(job_code: int | None = None, pkg_code: str | None = None):
+    cache = get_pkg_cache()
+    if cache:
+        cache.invalidate(job_code, pkg_code)
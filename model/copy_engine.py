@@ -0,0 +1,486 @@
+import hashlib
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import NamedTuple
+
+from model.export_journal import ExportJournal
+from model.fs_backend import get_backend
+
+DEFAULT_COPY_WORKERS = 8
+
+# SMB and FAT round mtimes; closer than this counts as unchanged in sync mode.
+MTIME_TOLERANCE_NS = 2_000_000_000
+HASH_CHUNK = 1024 * 1024
+
+# Files are written as ".<name>.part" next to their destination and renamed into place.
+TEMP_SUFFIX = ".part"
+
+# Copy progress is reported at most this often; the rate is averaged over RATE_WINDOW seconds.
+PROGRESS_INTERVAL = 0.25
+RATE_WINDOW = 5.0
+
+
+@dataclass
+class CopyResult:
+    """
+    Outcome of one export; `failed` holds (source path, reason) per file that did not copy.
+    `linked` files were hardlinked to another copy of the same source instead of
+    read again; `deduplicated` copies were replaced by a link to identical content.
+    """
+    copied: int = 0
+    skipped: int = 0
+    linked: int = 0
+    deduplicated: int = 0
+    removed: int = 0
+    walk_errors: int = 0
+    failed: list[tuple[str, str]] = field(default_factory=list)
+
+    @property
+    def failed_paths(self) -> list[str]:
+        """Failures formatted for write_miss_report(failed_paths=...)."""
+        return [f"{path} :: {reason}" for path, reason in self.failed]
+
+    def summary(self) -> str:
+        summary = (f"{self.copied} copied, {self.linked} linked, {self.deduplicated} deduplicated, "
+                   f"{self.skipped} skipped, {self.removed} removed, {len(self.failed)} failed")
+        if self.walk_errors:
+            summary += f", {self.walk_errors} folders unreadable"
+        return summary
+
+
+class CopyProgress(NamedTuple):
+    files_done: int
+    files_total: int
+    bytes_done: int
+    bytes_total: int
+    rate: float
+    eta: float | None
+    counting: bool
+
+    @property
+    def fraction(self) -> float | None:
+        """Share of the export done by bytes; None while files are still being submitted."""
+        if self.counting:
+            return None
+        if self.bytes_total:
+            return min(1.0, self.bytes_done / self.bytes_total)
+        return self.files_done / self.files_total if self.files_total else 1.0
+
+
+class CopyEngine:
+    """Copies export files on a bounded pool of worker threads; failures are collected, not raised."""
+
+    def __init__(self, overwrite: bool = False, workers: int = DEFAULT_COPY_WORKERS, backend=None,
+                 sync: bool = False, verify_hash: bool = False, on_progress=None,
+                 journal: ExportJournal | None = None):
+        self.overwrite = overwrite
+        self.sync = sync
+        self.verify_hash = verify_hash
+        self.journal = journal
+        self.workers = max(1, workers)
+        self.backend = backend or get_backend()
+        self.result = CopyResult()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="copy")
+        self._pending: set[Future] = set()
+        self._made_dirs: set[Path] = set()
+        self._expected: set[Path] = set()
+        self._claims: dict[Path, tuple[Path, Future]] = {}
+        self._by_source: dict[Path, Future] = {}
+        self._located: dict[Path, Path] = {}
+        self._fresh: set[Path] = set()
+        self._kept: dict[Path, int] = {}
+        self._place_lock = threading.Lock()
+        self._by_size: dict[int, list[Path]] = {}
+        self._digests: dict[Path, bytes] = {}
+        self._can_link = True
+
+        self.on_progress = on_progress
+        self._files_total = 0
+        self._files_done = 0
+        self._bytes_total = 0
+        self._bytes_done = 0
+        self._bytes_moved = 0
+        self._sizes: dict[Path, int] = {}
+        self._in_flight: dict[Path, Path] = {}
+        self._samples: deque[tuple[float, int]] = deque()
+        self._last_report = 0.0
+        self._closing = False
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def submit(self, src: str | Path, target_dir: Path):
+        """Queue one copy of `src` into `target_dir`, blocking while the queue is full."""
+        if target_dir not in self._made_dirs:
+            target_dir.mkdir(parents=True, exist_ok=True)
+            self._made_dirs.add(target_dir)
+
+        src = Path(src)
+        dest = target_dir / src.name
+        evict = None
+        claimant = self._claims.get(dest)
+        if claimant is not None:
+            owner, owner_future = claimant
+            if owner == src:
+                return
+            # The lowest source path keeps the plain name, whatever order the files arrive in.
+            tagged = self._disambiguate(dest, owner, src) if str(src) < str(owner) else None
+            if tagged is not None:
+                evict = (owner, owner_future, tagged)
+                self._claims[tagged] = claimant
+            else:
+                dest = self._disambiguate(dest, src, owner)
+                if dest is None:
+                    return
+
+        while len(self._pending) >= 2 * self.workers:
+            done, self._pending = wait(self._pending, timeout=self._tick_every, return_when=FIRST_COMPLETED)
+            self._report()
+        future = self._pool.submit(self._copy, src, dest, self._by_source.get(src), evict)
+        self._pending.add(future)
+        self._claims[dest] = (src, future)
+        self._by_source.setdefault(src, future)
+        with self._lock:
+            self._files_total += 1
+        self._report()
+
+    def _disambiguate(self, dest: Path, src: Path, other: Path) -> Path | None:
+        """
+        Name for `src` where `other` has `dest.name`: the first folder of its path
+        that differs from `other`'s is added, then a hash of its full source path.
+        None if `src` already has that name.
+        """
+        ours, theirs = src.parent.parts, other.parent.parts
+        split = next((i for i, (a, b) in enumerate(zip(ours, theirs)) if a != b), len(theirs))
+        folder = ours[split] if split < len(ours) else src.parent.name
+        tag = hashlib.blake2b(str(src).encode(), digest_size=3).hexdigest()
+        labels = (folder, f"{folder} {tag}")
+        for label in itertools.chain(labels, (f"{folder} {tag} {n}" for n in itertools.count(2))):
+            candidate = dest.with_name(f"{dest.stem} ({label}){dest.suffix}")
+            claimant = self._claims.get(candidate)
+            if claimant is None:
+                return candidate
+            if claimant[0] == src:
+                return None
+
+    def close(self) -> CopyResult:
+        """Wait for every queued copy and return the totals. Safe to call again."""
+        if self._closed:
+            return self.result
+        self._closing = True
+        while self._pending:
+            done, self._pending = wait(self._pending, timeout=self._tick_every)
+            self._report()
+        self._pool.shutdown(wait=True)
+        self._remove_leftovers()
+        self._report(final=True)
+        self._closed = True
+        return self.result
+
+    @property
+    def _tick_every(self) -> float | None:
+        return PROGRESS_INTERVAL if self.on_progress else None
+
+    def _report(self, final: bool = False):
+        if self.on_progress is None:
+            return
+        now = time.monotonic()
+        if not final and now - self._last_report < PROGRESS_INTERVAL:
+            return
+        self._last_report = now
+        try:
+            self.on_progress(self.progress())
+        except Exception as e:
+            print(f"[CopyEngine] progress callback failed :: {e}")
+
+    def progress(self) -> CopyProgress:
+        """Snapshot of the export so far; call from the submitting thread."""
+        with self._lock:
+            copying = {tmp: self._sizes.get(dest, 0) for dest, tmp in self._in_flight.items()}
+            files_done, files_total = self._files_done, self._files_total
+            bytes_done, bytes_total, moved = self._bytes_done, self._bytes_total, self._bytes_moved
+        partial = sum(min(_written(dest), size) for dest, size in copying.items())
+        bytes_done += partial
+        moved += partial
+
+        now = time.monotonic()
+        self._samples.append((now, moved))
+        while len(self._samples) > 2 and now - self._samples[1][0] >= RATE_WINDOW:
+            self._samples.popleft()
+        since, moved_then = self._samples[0]
+        rate = (moved - moved_then) / (now - since) if now > since else 0.0
+        # Totals only cover the files queued so far until close(); no ETA from those.
+        eta = (bytes_total - bytes_done) / rate if rate > 0 and self._closing else None
+        return CopyProgress(files_done, files_total, bytes_done, bytes_total, rate, eta, not self._closing)
+
+    def _copy(self, src: Path, dest: Path, first: Future | None, evict: tuple[Path, Future, Path] | None) -> Path | None:
+        """
+        Copy one file and return where its content ended up. `first` is the copy
+        of the same source into another folder, which is hardlinked instead of
+        read again; `evict` is the copy that took this file name first and moves
+        to its tagged name to make room.
+        """
+        try:
+            return self._copy_one(src, dest, first, evict)
+        finally:
+            with self._lock:
+                self._files_done += 1
+                self._bytes_done += self._sizes.pop(dest, 0)
+
+    def _copy_one(self, src: Path, dest: Path, first: Future | None, evict: tuple[Path, Future, Path] | None) -> Path | None:
+        try:
+            evicted = evict is not None and evict[1].result() is not None
+            try:
+                src_st = self.backend.stat(src)
+            except FileNotFoundError:
+                self._expect(dest)
+                self._failed(src, "source file not found")
+                return None
+            with self._lock:
+                self._sizes[dest] = src_st.st_size
+                self._bytes_total += src_st.st_size
+
+            # A file kept at `dest` from an earlier export may be the evicted one's.
+            unknown = evicted and not self._evict(evict[0], dest, evict[2])
+
+            self._expect(dest)
+            if not unknown and self._already_done(src, src_st, dest):
+                with self._lock:
+                    self.result.skipped += 1
+                    self._kept[dest] = src_st.st_size
+                self._journal(dest, src_st)
+                return self._placed(src, dest)
+
+            if first is not None and first.result() is not None:
+                with self._place_lock:
+                    origin = self._located.get(src)
+                    linked = origin is not None and self._link(origin, dest)
+                if linked:
+                    with self._lock:
+                        self.result.linked += 1
+                        self._fresh.add(dest)
+                    self._journal(dest, src_st)
+                    return self._placed(src, dest)
+
+            tmp = _temp_path(dest)
+            with self._lock:
+                self._in_flight[dest] = tmp
+            try:
+                self.backend.copy_file(src, tmp)  # preserve mtime/metadata
+                os.replace(tmp, dest)  # also never writes through a hardlinked dest
+            except BaseException:
+                tmp.unlink(missing_ok=True)
+                raise
+            finally:
+                with self._lock:
+                    del self._in_flight[dest]
+        except Exception as e:
+            self._failed(src, str(e))
+            return None
+
+        with self._lock:
+            self.result.copied += 1
+            self._bytes_moved += src_st.st_size
+            self._fresh.add(dest)
+        self._dedupe(dest)
+        self._journal(dest, src_st)
+        return self._placed(src, dest)
+
+    def _placed(self, src: Path, dest: Path) -> Path:
+        with self._lock:
+            self._located.setdefault(src, dest)
+        return dest
+
+    def _evict(self, owner: Path, dest: Path, tagged: Path) -> bool:
+        """
+        Give `dest` up to a file that sorts before `owner`: a copy this export
+        wrote is renamed to `tagged` (True), a kept one is exported there afresh.
+        """
+        with self._place_lock:
+            with self._lock:
+                fresh = dest in self._fresh
+                if self._located.get(owner) == dest:
+                    del self._located[owner]
+            if fresh:
+                os.replace(dest, tagged)
+                with self._lock:
+                    self._expected.add(tagged)
+                    self._located.setdefault(owner, tagged)
+                    self._fresh.add(tagged)
+                    digest = self._digests.pop(dest, None)
+                    if digest is not None:
+                        self._digests[tagged] = digest
+                    for paths in self._by_size.values():
+                        if dest in paths:
+                            paths[paths.index(dest)] = tagged
+        if not fresh:
+            with self._lock:
+                # The export to `tagged` replaces the skip at `dest` in the totals.
+                if dest in self._kept:
+                    size = self._kept.pop(dest)
+                    self.result.skipped -= 1
+                    self._files_done -= 1
+                    self._bytes_total -= size
+                    self._bytes_done -= size
+                else:
+                    self._files_total += 1
+            self._copy(owner, tagged, None, None)
+        return fresh
+
+    def _already_done(self, src: Path, src_st, dest: Path) -> bool:
+        if not dest.exists():
+            return False
+        # Files only get their final name once complete, so the journal can only add to what is kept.
+        if (self.journal is not None and self.journal.resuming
+                and self.journal.is_done(dest, src_st.st_size, src_st.st_mtime_ns)
+                and dest.stat().st_size == src_st.st_size):
+            return True
+        return self._unchanged(src, src_st, dest) if self.sync else not self.overwrite
+
+    def _journal(self, dest: Path, src_st):
+        if self.journal is not None:
+            self.journal.record(dest, src_st.st_size, src_st.st_mtime_ns)
+
+    def _remove_leftovers(self):
+        """Delete temporary files an earlier, interrupted export left in the folders used."""
+        for target_dir in self._made_dirs:
+            try:
+                entries = list(os.scandir(target_dir))
+            except OSError:
+                continue
+            for entry in entries:
+                if is_temp_copy(entry.name):
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+
+    def _expect(self, dest: Path):
+        with self._lock:
+            self._expected.add(dest)
+
+    def _unchanged(self, src: Path, src_st, dest: Path) -> bool:
+        dest_st = dest.stat()
+        if src_st.st_size != dest_st.st_size:
+            return False
+        same_mtime = abs(src_st.st_mtime_ns - dest_st.st_mtime_ns) <= MTIME_TOLERANCE_NS
+        if same_mtime and not self.verify_hash:
+            return True
+        # A deduplicated file carries the mtime of the copy it links to.
+        if self.verify_hash or dest_st.st_nlink > 1:
+            with self.backend.open_read(src) as a, open(dest, "rb") as b:
+                return _digest(a) == _digest(b)
+        return False
+
+    def _dedupe(self, dest: Path):
+        """
+        Replace a fresh copy with a hardlink to an earlier copy of the same
+        content. Only copies of equal size are hashed, and only locally.
+        """
+        if not self._can_link:
+            return
+        size = dest.stat().st_size
+        if size == 0:
+            return
+        with self._lock:
+            earlier = list(self._by_size.get(size, ()))
+            self._by_size.setdefault(size, []).append(dest)
+        if not earlier:
+            return
+
+        with open(dest, "rb") as f:
+            digest = self._digests[dest] = _digest(f)  # fresh: an evicted file may have had this name
+        for other in earlier:
+            try:
+                same = self._local_digest(other) == digest
+            except OSError:
+                continue
+            if same:
+                if self._link(other, dest):
+                    with self._lock:
+                        self.result.deduplicated += 1
+                return
+
+    def _local_digest(self, path: Path) -> bytes:
+        digest = self._digests.get(path)
+        if digest is None:
+            with open(path, "rb") as f:
+                digest = self._digests[path] = _digest(f)
+        return digest
+
+    def _link(self, origin: Path, dest: Path) -> bool:
+        """Point `dest` at `origin`'s data. False (and no more attempts) where links are unsupported."""
+        if not self._can_link:
+            return False
+        tmp = _temp_path(dest)
+        try:
+            os.link(origin, tmp)
+            os.replace(tmp, dest)
+        except OSError as e:
+            print(f"[CopyEngine] Hardlinks unavailable, copying instead :: {e}")
+            self._can_link = False
+            tmp.unlink(missing_ok=True)
+            return False
+        return True
+
+    def prune(self, target_dirs) -> int:
+        """
+        Delete files in `target_dirs` that were not part of this export.
+        Call after close(); only the files directly inside each folder are touched.
+        """
+        removed = 0
+        for target_dir in target_dirs:
+            try:
+                entries = list(os.scandir(target_dir))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                if not entry.is_file(follow_symlinks=False) or Path(entry.path) in self._expected:
+                    continue
+                try:
+                    os.remove(entry.path)
+                    removed += 1
+                except OSError as e:
+                    self._failed(Path(entry.path), f"could not remove stale file: {e}")
+        with self._lock:
+            self.result.removed += removed
+        return removed
+
+    def _failed(self, src: Path, reason: str):
+        with self._lock:
+            self.result.failed.append((str(src), reason))
+
+
+def _digest(f) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+        h.update(chunk)
+    return h.digest()
+
+
+def _temp_path(dest: Path) -> Path:
+    return dest.with_name(f".{dest.name}{TEMP_SUFFIX}")
+
+
+def is_temp_copy(name: str) -> bool:
+    """True for the temporary name of a copy that has not been renamed into place."""
+    return name.startswith(".") and name.endswith(TEMP_SUFFIX)
+
+
+def _written(path: Path) -> int:
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
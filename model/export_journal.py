@@ -0,0 +1,96 @@
+import json
+import threading
+import time
+from pathlib import Path
+
+JOURNAL_NAME = ".jobscan_journal.jsonl"
+
+
+class ExportJournal:
+    """
+    Append-only record of the files an export has finished, kept in the export root.
+
+    Each finished file is one JSON line with its path relative to the root and
+    the size and mtime of the source it was copied from; a completed export
+    ends with a {"done": ...} line. If the last export never got that far
+    (JobScan closed, share dropped), the journal is reopened in resume mode:
+    files it lists whose source is unchanged do not need copying again.
+    A finished journal is started over by the next export.
+    """
+
+    def __init__(self, output_root: Path):
+        self.root = Path(output_root)
+        self.path = self.root / JOURNAL_NAME
+        self.entries: dict[str, tuple[int, int]] = {}
+        self.resuming = False
+        self._lock = threading.Lock()
+        self._file = None
+        self._load()
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def _load(self):
+        try:
+            lines = self.path.read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            print(f"[ExportJournal] Could not read {self.path} :: {e}")
+            return
+
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # torn last line from an interrupted write
+            if "done" in record:
+                self.entries.clear()
+                self.resuming = False
+            elif "dest" in record:
+                self.entries[record["dest"]] = (record["size"], record["mtime_ns"])
+                self.resuming = True
+        if self.resuming:
+            print(f"[ExportJournal] Resuming interrupted export: {len(self.entries)} file(s) already done")
+
+    def open(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a" if self.resuming else "w", encoding="utf-8")
+        if not self.resuming:
+            self._write({"started": time.time()})
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _key(self, dest: Path) -> str:
+        return Path(dest).relative_to(self.root).as_posix()
+
+    def _write(self, record: dict):
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def is_done(self, dest: Path, size: int, mtime_ns: int) -> bool:
+        """True if `dest` was finished from a source of this size and mtime."""
+        return self.entries.get(self._key(dest)) == (size, mtime_ns)
+
+    def record(self, dest: Path, size: int, mtime_ns: int):
+        key = self._key(dest)
+        with self._lock:
+            if self.entries.get(key) == (size, mtime_ns) or self._file is None:
+                return
+            self.entries[key] = (size, mtime_ns)
+            self._write({"dest": key, "size": size, "mtime_ns": mtime_ns})
+
+    def finish(self):
+        """Mark the export complete; the next export starts a new journal."""
+        with self._lock:
+            if self._file is not None:
+                self._write({"done": time.time()})
@@ -0,0 +1,286 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections.abc import Iterable
+from pathlib import Path
+
+from model.fs_backend import get_backend
+from model.walker import DEFAULT_WALK_WORKERS, WalkStats, is_excluded, run_tree
+
+INDEX_PATH = Path(os.getenv("LOCALAPPDATA", tempfile.gettempdir())) / "JobScan" / "file_index.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    path      TEXT PRIMARY KEY,
+    parent    TEXT,
+    mtime_ns  INTEGER NOT NULL,
+    listed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs(parent);
+
+CREATE TABLE IF NOT EXISTS files (
+    path      TEXT PRIMARY KEY,
+    dir       TEXT NOT NULL,
+    name      TEXT NOT NULL,
+    ext       TEXT NOT NULL,
+    size      INTEGER,
+    mtime_ns  INTEGER
+);
+CREATE INDEX IF NOT EXISTS files_dir ON files(dir);
+CREATE INDEX IF NOT EXISTS files_ext ON files(ext);
+"""
+
+
+class FileIndex:
+    """
+    Persistent SQLite index of the NC and Shop Drawings shares.
+
+    Each directory row stores the mtime it had when it was last listed. A refresh
+    stats every indexed directory but only re-lists the ones whose mtime moved,
+    so unchanged job folders cost one round trip per directory instead of a full
+    listing. WAL mode plus short IMMEDIATE transactions lets several JobScan
+    instances read and refresh the same file concurrently.
+
+    Note: a directory's mtime only changes when entries are added, removed or
+    renamed, so size/mtime of a file rewritten in place may lag until its folder
+    is re-listed. Discovery only relies on paths and names.
+    """
+
+    def __init__(self, db_path: Path = INDEX_PATH, busy_timeout: float = 30.0):
+        self.db_path = Path(db_path)
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._conn()
+        with conn:
+            conn.executescript(_SCHEMA)
+
+    # --- connection handling ---
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout * 1000)}")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # --- refresh ---
+    def refresh(self, top: Path, workers: int = DEFAULT_WALK_WORKERS, exclude: Iterable[str] = (),
+                max_depth: int | None = None, backend=None) -> tuple[int, int]:
+        """
+        Bring the index for `top` up to date, checking up to `workers` directories at once.
+        Sub-folders matching `exclude` or deeper than `max_depth` are not descended into.
+        Returns (directories checked, directories re-listed).
+        """
+        checked = relisted = 0
+        for _, outcome in self._refresh_tree(top, workers, exclude, max_depth, backend, None):
+            if outcome is None:
+                continue
+            checked += 1
+            relisted += outcome
+        return checked, relisted
+
+    def walk(self, top: Path, exts: tuple[str, ...] | None = None, workers: int = DEFAULT_WALK_WORKERS,
+             exclude: Iterable[str] = (), max_depth: int | None = None, backend=None,
+             stats: WalkStats | None = None):
+        """
+        Refresh `top` like refresh(), yielding (dir, [file names]) for each directory
+        as soon as that directory is up to date instead of after the whole tree.
+        Directories that could not be read are tallied in `stats`.
+        """
+        checked = relisted = 0
+        for path, outcome in self._refresh_tree(top, workers, exclude, max_depth, backend, stats):
+            if outcome is None:
+                continue
+            checked += 1
+            relisted += outcome
+            names = self._names_in(path, exts)
+            if names:
+                yield path, names
+        print(f"[INDEX] {top}: {checked} dirs checked, {relisted} re-listed")
+
+    def _refresh_tree(self, top: Path, workers: int, exclude: Iterable[str], max_depth: int | None, backend,
+                      stats: WalkStats | None):
+        """Yield (dir, re-listed?) per directory in completion order; None for directories that are gone."""
+        exclude = tuple(exclude)
+        backend = backend or get_backend()
+
+        def visit(item: tuple[str, int]):
+            path, depth = item
+            outcome, children = self._refresh_dir(path, backend, stats)
+            if max_depth is not None and depth >= max_depth:
+                return (path, outcome), []
+            return (path, outcome), [(c, depth + 1) for c in children
+                                     if not (exclude and is_excluded(os.path.basename(c), exclude))]
+
+        yield from run_tree([(str(top), 0)], visit, workers)
+
+    def _refresh_dir(self, path: str, backend, stats: WalkStats | None = None) -> tuple[bool | None, list[str]]:
+        """Visit one directory: (re-listed?, child dirs), or (None, []) if it is gone or unreadable."""
+        try:
+            mtime_ns = backend.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            self._forget_tree(path)
+            return None, []
+        except OSError as e:
+            print(f"[WARN] index stat failed: {path} :: {e}")
+            if stats is not None:
+                stats.record_error("stat", path, e)
+            return None, []
+
+        row = self._conn().execute("SELECT mtime_ns FROM dirs WHERE path = ?", (path,)).fetchone()
+        if row is not None and row[0] == mtime_ns:
+            return False, self._child_dirs(path)
+
+        listing = self._list_dir(path, backend, stats)
+        if listing is None:
+            return None, []
+        subdirs, files = listing
+        self._store_listing(path, mtime_ns, subdirs, files)
+        return True, subdirs
+
+    def _list_dir(self, path: str, backend, stats: WalkStats | None = None):
+        subdirs, files = [], []
+        try:
+            with backend.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        else:
+                            st = entry.stat(follow_symlinks=False)
+                            files.append((entry.path, entry.name, st.st_size, st.st_mtime_ns))
+                    except OSError as e:
+                        print(f"[WARN] index stat failed: {entry.path} :: {e}")
+                        if stats is not None:
+                            stats.record_error("stat", entry.path, e)
+        except OSError as e:
+            print(f"[WARN] index scandir failed: {path} :: {e}")
+            if stats is not None:
+                stats.record_error("scandir", path, e)
+            return None
+        return subdirs, files
+
+    def _store_listing(self, path: str, mtime_ns: int, subdirs: list[str], files: list[tuple]):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            stale = set(self._child_dirs(path)) - set(subdirs)
+            for child in stale:
+                self._delete_tree(conn, child)
+
+            conn.execute("DELETE FROM files WHERE dir = ?", (path,))
+            conn.executemany(
+                "INSERT OR REPLACE INTO files (path, dir, name, ext, size, mtime_ns) VALUES (?, ?, ?, ?, ?, ?)",
+                [(fp, path, name, os.path.splitext(name)[1].lower(), size, mt) for fp, name, size, mt in files],
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO dirs (path, parent, mtime_ns, listed_at) VALUES (?, ?, ?, ?)",
+                (path, os.path.dirname(path), mtime_ns, time.time()),
+            )
+            # Register new subdirectories with a sentinel mtime so they always get listed.
+            conn.executemany(
+                "INSERT OR IGNORE INTO dirs (path, parent, mtime_ns, listed_at) VALUES (?, ?, -1, 0)",
+                [(d, path) for d in subdirs],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _child_dirs(self, path: str) -> list[str]:
+        rows = self._conn().execute("SELECT path FROM dirs WHERE parent = ?", (path,)).fetchall()
+        return [r[0] for r in rows]
+
+    def _forget_tree(self, path: str):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._delete_tree(conn, path)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _delete_tree(conn: sqlite3.Connection, path: str):
+        lo, hi = _subtree_bounds(path)
+        conn.execute("DELETE FROM files WHERE dir = ? OR (dir >= ? AND dir < ?)", (path, lo, hi))
+        conn.execute("DELETE FROM dirs WHERE path = ? OR (path >= ? AND path < ?)", (path, lo, hi))
+
+    # --- queries ---
+    def _names_in(self, path: str, exts: tuple[str, ...] | None) -> list[str]:
+        sql = "SELECT name FROM files WHERE dir = ?"
+        params: list = [path]
+        if exts:
+            sql += f" AND ext IN ({', '.join('?' * len(exts))})"
+            params.extend(e.lower() for e in exts)
+        return [r[0] for r in self._conn().execute(sql, params)]
+
+    def files_under(self, top: Path, exts: tuple[str, ...] | None = None, exclude: Iterable[str] = (),
+                    max_depth: int | None = None) -> list[tuple[str, list[str]]]:
+        """
+        Return [(dir, [file names])] for every indexed directory under `top`,
+        applying the same `exclude` globs and `max_depth` as refresh().
+        """
+        path = str(top)
+        lo, hi = _subtree_bounds(path)
+        sql = "SELECT dir, name FROM files WHERE (dir = ? OR (dir >= ? AND dir < ?))"
+        params: list = [path, lo, hi]
+        if exts:
+            sql += f" AND ext IN ({', '.join('?' * len(exts))})"
+            params.extend(e.lower() for e in exts)
+        sql += " ORDER BY dir"
+
+        exclude = tuple(exclude)
+        grouped: list[tuple[str, list[str]]] = []
+        for d, name in self._conn().execute(sql, params):
+            if not grouped or grouped[-1][0] != d:
+                grouped.append((d, []))
+            grouped[-1][1].append(name)
+
+        if not exclude and max_depth is None:
+            return grouped
+
+        kept = []
+        for d, names in grouped:
+            rel = d[len(lo):].split(os.sep) if d != path else []
+            if max_depth is not None and len(rel) > max_depth:
+                continue
+            if exclude and any(is_excluded(part, exclude) for part in rel):
+                continue
+            kept.append((d, names))
+        return kept
+
+
+def _subtree_bounds(path: str) -> tuple[str, str]:
+    """Half-open string range covering every path strictly below `path`."""
+    prefix = path.rstrip("\\/") + os.sep
+    return prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
+
+_default_index: FileIndex | None = None
+_default_lock = threading.Lock()
+
+
+def get_file_index() -> FileIndex | None:
+    """Process-wide index, or None when the database cannot be opened."""
+    global _default_index
+    with _default_lock:
+        if _default_index is None:
+            try:
+                _default_index = FileIndex()
+            except (sqlite3.Error, OSError) as e:
+                print(f"[WARN] file index disabled :: {e}")
+                return None
+        return _default_index
@@ -0,0 +1,273 @@
+import io
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+DEFAULT_NC_ROOT = r'\\mfcsa1\NC Files'
+DEFAULT_DRAWING_ROOT = r'\\mfcsa1\Shop Drawings\Jobs'
+
+
+class LocalBackend:
+    """
+    File system access for discovery, copy and zip.
+
+    Every share operation JobScan performs goes through one of these methods, so
+    the NC and Drawings roots can point at the production share, a local mirror,
+    or an in-memory fake tree. scandir() returns os.DirEntry-compatible entries.
+    """
+    kind = "local"
+
+    def __init__(self, nc_root: str | Path, drawing_root: str | Path):
+        self.nc_root = Path(nc_root)
+        self.drawing_root = Path(drawing_root)
+
+    def __repr__(self):
+        return f"{type(self).__name__}(nc_root={str(self.nc_root)!r}, drawing_root={str(self.drawing_root)!r})"
+
+    def scandir(self, path):
+        return os.scandir(path)
+
+    def stat(self, path):
+        return os.stat(path)
+
+    def is_dir(self, path) -> bool:
+        return os.path.isdir(path)
+
+    def is_file(self, path) -> bool:
+        return os.path.isfile(path)
+
+    def open_read(self, path):
+        return open(path, "rb")
+
+    def copy_file(self, src, dest: Path):
+        """Copy `src` from this backend to the local path `dest`, keeping mtime."""
+        shutil.copy2(src, dest)
+
+
+class ShareBackend(LocalBackend):
+    """
+    Mounted SMB share. Same calls as LocalBackend, but listings, stats and copies
+    are retried a couple of times on transient network errors before giving up.
+    """
+    kind = "share"
+
+    def __init__(self, nc_root: str | Path = DEFAULT_NC_ROOT, drawing_root: str | Path = DEFAULT_DRAWING_ROOT,
+                 retries: int = 2, backoff: float = 0.25):
+        super().__init__(nc_root, drawing_root)
+        self.retries = retries
+        self.backoff = backoff
+
+    def _retry(self, fn, *args):
+        for attempt in range(self.retries + 1):
+            try:
+                return fn(*args)
+            except (FileNotFoundError, NotADirectoryError, PermissionError):
+                raise
+            except OSError:
+                if attempt >= self.retries:
+                    raise
+                time.sleep(self.backoff * (attempt + 1))
+
+    def scandir(self, path):
+        return self._retry(os.scandir, path)
+
+    def stat(self, path):
+        return self._retry(os.stat, path)
+
+    def copy_file(self, src, dest: Path):
+        self._retry(shutil.copy2, src, dest)
+
+
+class _MemStat(NamedTuple):
+    st_size: int
+    st_mtime_ns: int
+
+    @property
+    def st_mtime(self) -> float:
+        return self.st_mtime_ns / 1e9
+
+
+class _MemEntry:
+    """os.DirEntry look-alike for MemoryBackend listings."""
+
+    def __init__(self, backend: "MemoryBackend", path: str, name: str):
+        self._backend = backend
+        self.path = path
+        self.name = name
+
+    def is_dir(self, follow_symlinks: bool = True) -> bool:
+        return self.path in self._backend._dirs
+
+    def is_file(self, follow_symlinks: bool = True) -> bool:
+        return self.path in self._backend._files
+
+    def stat(self, follow_symlinks: bool = True) -> _MemStat:
+        return self._backend.stat(self.path)
+
+
+class _MemScandir:
+    def __init__(self, entries: list[_MemEntry]):
+        self._entries = entries
+
+    def __enter__(self):
+        return iter(self._entries)
+
+    def __exit__(self, *exc):
+        return False
+
+    def __iter__(self):
+        return iter(self._entries)
+
+
+class MemoryBackend:
+    """
+    In-memory fake share for tests and benchmarks.
+
+    Paths use '/' (backslashes are accepted and normalized). Adding or removing an
+    entry bumps its parent's mtime like a real file system, so the file index and
+    job-folder cache revalidate correctly. `latency` adds a per-call delay to
+    scandir/stat to mimic a high-latency SMB link.
+    """
+    kind = "memory"
+
+    def __init__(self, nc_root: str = "/mem/NC Files", drawing_root: str = "/mem/Shop Drawings/Jobs",
+                 latency: float = 0.0):
+        self.nc_root = Path(nc_root)
+        self.drawing_root = Path(drawing_root)
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._dirs: dict[str, tuple[set[str], int]] = {"/": (set(), time.time_ns())}
+        self._files: dict[str, tuple[bytes, int]] = {}
+        self.add_dir(nc_root)
+        self.add_dir(drawing_root)
+
+    def __repr__(self):
+        return f"MemoryBackend({len(self._dirs)} dirs, {len(self._files)} files)"
+
+    @staticmethod
+    def _norm(path) -> str:
+        p = str(path).replace("\\", "/")
+        while "//" in p:
+            p = p.replace("//", "/")
+        return p.rstrip("/") or "/"
+
+    def _touch_parent(self, path: str, name: str, now: int):
+        parent = path.rsplit("/", 1)[0] or "/"
+        if parent not in self._dirs:
+            self._add_dir_locked(parent, now)
+        children, _ = self._dirs[parent]
+        children.add(name)
+        self._dirs[parent] = (children, now)
+
+    def _add_dir_locked(self, path: str, now: int):
+        if path in self._dirs:
+            return
+        self._dirs[path] = (set(), now)
+        if path != "/":
+            self._touch_parent(path, path.rsplit("/", 1)[1], now)
+
+    # --- building the fake tree ---
+    def add_dir(self, path):
+        with self._lock:
+            self._add_dir_locked(self._norm(path), time.time_ns())
+
+    def add_file(self, path, data: bytes = b"", mtime_ns: int | None = None):
+        p = self._norm(path)
+        now = time.time_ns()
+        with self._lock:
+            self._files[p] = (bytes(data), mtime_ns if mtime_ns is not None else now)
+            self._touch_parent(p, p.rsplit("/", 1)[1], now)
+
+    def remove(self, path):
+        p = self._norm(path)
+        now = time.time_ns()
+        with self._lock:
+            for key in [k for k in self._files if k == p or k.startswith(p + "/")]:
+                del self._files[key]
+            for key in [k for k in self._dirs if k == p or k.startswith(p + "/")]:
+                del self._dirs[key]
+            parent, name = p.rsplit("/", 1)
+            parent = parent or "/"
+            if parent in self._dirs:
+                children, _ = self._dirs[parent]
+                children.discard(name)
+                self._dirs[parent] = (children, now)
+
+    # --- backend interface ---
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def scandir(self, path):
+        self._wait()
+        p = self._norm(path)
+        with self._lock:
+            if p not in self._dirs:
+                if p in self._files:
+                    raise NotADirectoryError(p)
+                raise FileNotFoundError(p)
+            names = sorted(self._dirs[p][0])
+        base = "" if p == "/" else p
+        return _MemScandir([_MemEntry(self, f"{base}/{name}", name) for name in names])
+
+    def stat(self, path) -> _MemStat:
+        self._wait()
+        p = self._norm(path)
+        with self._lock:
+            if p in self._files:
+                data, mtime = self._files[p]
+                return _MemStat(len(data), mtime)
+            if p in self._dirs:
+                return _MemStat(0, self._dirs[p][1])
+        raise FileNotFoundError(p)
+
+    def is_dir(self, path) -> bool:
+        return self._norm(path) in self._dirs
+
+    def is_file(self, path) -> bool:
+        return self._norm(path) in self._files
+
+    def open_read(self, path):
+        p = self._norm(path)
+        with self._lock:
+            if p not in self._files:
+                raise FileNotFoundError(p)
+            return io.BytesIO(self._files[p][0])
+
+    def copy_file(self, src, dest: Path):
+        data, mtime = self._files.get(self._norm(src), (None, 0))
+        if data is None:
+            raise FileNotFoundError(src)
+        Path(dest).write_bytes(data)
+        os.utime(dest, ns=(mtime, mtime))
+
+
+BACKENDS = {"share": ShareBackend, "local": LocalBackend}
+
+_backend: LocalBackend | MemoryBackend | None = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """The process-wide backend; the production share unless configured otherwise."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = ShareBackend()
+        return _backend
+
+
+def set_backend(backend):
+    global _backend
+    with _backend_lock:
+        _backend = backend
+    print(f"[fs_backend] Using {backend!r}")
+
+
+def backend_from_config(kind: str = "share", nc_root: str = "", drawing_root: str = ""):
+    """Build a share/local backend from saved settings, falling back to the default roots."""
+    cls = BACKENDS.get((kind or "share").lower(), ShareBackend)
+    return cls(nc_root or DEFAULT_NC_ROOT, drawing_root or DEFAULT_DRAWING_ROOT)
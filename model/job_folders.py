@@ -0,0 +1,114 @@
+import re
+import threading
+import time
+from pathlib import Path
+
+from model.fs_backend import get_backend
+
+JOB_FOLDER_TTL = 300.0
+
+_JOB_NUMBER = re.compile(r"^(\d+)(?!\d)")
+
+
+class _RootListing:
+    def __init__(self, mtime_ns: int, folders: dict[int, list[Path]]):
+        self.mtime_ns = mtime_ns
+        self.folders = folders
+        self.checked_at = time.monotonic()
+
+
+class JobFolderResolver:
+    """
+    Resolve a job code to its folders under a share root.
+
+    Each root (NC Files, Shop Drawings\\Jobs) is listed once and kept as a
+    job number -> folders map. Within `ttl` seconds the cached map is used as-is;
+    after that the root is re-stat'ed and only re-listed if its mtime moved, which
+    happens whenever a folder is added, removed or renamed under it.
+
+    Folder names match on the whole leading job number, so job 123 matches
+    "123 - Plant" and "123A" but not "1234 - Warehouse".
+    """
+
+    def __init__(self, ttl: float = JOB_FOLDER_TTL):
+        self.ttl = ttl
+        self._cache: dict[str, _RootListing] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, root: Path, job_code: int | str, backend=None) -> list[Path]:
+        try:
+            job = int(str(job_code).strip())
+        except ValueError:
+            return []
+
+        listing = self._listing(Path(root), backend or get_backend())
+        return list(listing.folders.get(job, [])) if listing else []
+
+    def invalidate(self, root: Path | None = None):
+        with self._lock:
+            if root is None:
+                self._cache.clear()
+            else:
+                for key in [k for k in self._cache if k.split(":", 1)[1] == str(root)]:
+                    del self._cache[key]
+
+    def _listing(self, root: Path, backend) -> _RootListing | None:
+        key = f"{backend.kind}:{root}"
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and time.monotonic() - cached.checked_at < self.ttl:
+                return cached
+
+        try:
+            mtime_ns = backend.stat(root).st_mtime_ns
+        except OSError as e:
+            print(f"[WARN] job root unavailable: {root} :: {e}")
+            return cached
+
+        if cached and cached.mtime_ns == mtime_ns:
+            cached.checked_at = time.monotonic()
+            return cached
+
+        listing = self._list_root(root, mtime_ns, backend)
+        if listing is None:
+            return cached
+        with self._lock:
+            self._cache[key] = listing
+        return listing
+
+    @staticmethod
+    def _list_root(root: Path, mtime_ns: int, backend) -> _RootListing | None:
+        folders: dict[int, list[Path]] = {}
+        try:
+            with backend.scandir(root) as it:
+                for entry in it:
+                    m = _JOB_NUMBER.match(entry.name)
+                    if not m:
+                        continue
+                    try:
+                        if not entry.is_dir():
+                            continue
+                    except OSError as e:
+                        print(f"[WARN] stat failed: {entry.path} :: {e}")
+                        continue
+                    folders.setdefault(int(m.group(1)), []).append(Path(entry.path))
+        except OSError as e:
+            print(f"[WARN] iterdir failed: {root} :: {e}")
+            return None
+
+        for paths in folders.values():
+            paths.sort()
+        print(f"[JobFolders] Listed {root}: {sum(map(len, folders.values()))} job folders")
+        return _RootListing(mtime_ns, folders)
+
+
+_resolver = JobFolderResolver()
+
+
+def resolve_job_folders(root: Path, job_code: int | str, backend=None) -> list[Path]:
+    """Folders under `root` that belong to `job_code`, via the process-wide cache."""
+    return _resolver.resolve(root, job_code, backend)
+
+
+def invalidate_job_folders(root: Path | None = None):
+    _resolver.invalidate(root)
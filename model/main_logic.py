@@ -1,177 +1,433 @@
+import bisect
 import os
 import re
 import shutil
+import sqlite3
+import time
+import zipfile
 from pathlib import Path
-from collections.abc import Iterable
-from typing import Any
+from collections.abc import Iterable, Iterator
+from typing import Any, NamedTuple
 
 from model.SQL_logic import build_pkg_content_list
+from model.copy_engine import DEFAULT_COPY_WORKERS, CopyEngine, CopyResult, is_temp_copy
+from model.export_journal import JOURNAL_NAME, ExportJournal
+from model.file_index import FileIndex, get_file_index
+from model.fs_backend import LocalBackend, get_backend
+from model.job_folders import resolve_job_folders
+from model.mark_matcher import MarkMatcher
+from model.walker import DEFAULT_EXCLUDES, DEFAULT_WALK_WORKERS, WalkStats, walk_entries
 
-NC_drive = Path(r'\\mfcsa1\NC Files')
-drawing_drive = Path(r'\\mfcsa1\Shop Drawings\Jobs')
+def get_nc_job_folders(job_code: int, backend=None) -> list[Path]:
+    """Return NC job folders for the given job code."""
+    backend = backend or get_backend()
+    return resolve_job_folders(backend.nc_root, job_code, backend)
 
 
-def get_nc_job_folders(job_code: int):
-    """Return NC job folders whose names start with the given job code."""
-    job_prefix = str(job_code)
-    try:
-        return [
-            folder for folder in NC_drive.iterdir()
-            if folder.is_dir() and folder.name.startswith(job_prefix)
-        ]
-    except Exception as e:
-        print(f"[ERROR] Failed to iterate NC drive: {e}")
-        return []
-
-
-def _safe_iterdir(path: Path):
-    """Yield children of a directory, warning instead of raising on failure."""
-    try:
-        for p in path.iterdir():
-            yield p
-    except Exception as e:
-        print(f"[WARN] iterdir failed: {path} :: {e}")
+def get_drawing_job_folders(job_code: int, backend=None) -> list[Path]:
+    """Return Shop Drawings job folders for the given job code."""
+    backend = backend or get_backend()
+    return resolve_job_folders(backend.drawing_root, job_code, backend)
 
 
-def _safe_walk(top: Path):
+def _iter_tree_files(tops: list[Path], index: FileIndex | None, exts: tuple[str, ...], workers: int,
+                     exclude: tuple[str, ...] = (), max_depth: int | None = None,
+                     stats: WalkStats | None = None, backend=None):
     """
-    A safe, recursive generator similar to os.walk created in pain trying to debug errors :P
+    Yield (root, files) for every directory under `tops` as soon as it is listed.
+    Served from the persistent index when available, otherwise walked live.
     """
-    dirs, files = [], []
-    try:
-        with os.scandir(top) as it:
-            for entry in it:
-                try:
-                    if entry.is_dir(follow_symlinks=False):
-                        dirs.append(entry.path)
-                    else:
-                        files.append(entry.name)
-                except Exception as e:
-                    print(f"[WARN] stat failed: {entry.path} :: {e}")
-    except Exception as e:
-        print(f"[WARN] scandir failed: {top} :: {e}")
-        return
+    served: set[str] = set()
+    if index is not None:
+        try:
+            for top in tops:
+                for root, files in index.walk(top, exts, workers, exclude, max_depth, backend, stats):
+                    served.add(root)
+                    yield root, files
+            return
+        except sqlite3.Error as e:
+            print(f"[WARN] file index failed, walking share :: {e}")
+
+    for root, dirs, files in walk_entries(tops, workers, max_depth, exclude, stats, backend):
+        if root not in served:
+            yield root, [entry.name for entry in files]
+
+
+# (category, kind) -> (export type that selects it, output subfolder)
+EXPORT_BUCKETS = {
+    ("nc", "part"):      ("NC", "NC/PARTS"),
+    ("nc", "mainmark"):  ("NC", "NC/ASSEMBLIES"),
+    ("dxf", "part"):     ("DXF", "DXF/PARTS"),
+    ("dxf", "mainmark"): ("DXF", "DXF/ASSEMBLIES"),
+    ("enc", None):       ("ENC", "ENC"),
+    ("pdf", "part"):     ("PART", "PDF/PARTS"),
+    ("pdf", "mainmark"): ("ASSEMBLY", "PDF/ASSEMBLIES"),
+}
+
+ALL_TARGETS = ["ASSEMBLY", "PART", "NC", "DXF", "ENC"]
+
+_CATEGORY_EXTS = {"nc": ".nc1", "dxf": ".dxf", "enc": ".enc", "pdf": ".pdf"}
+
+
+def plan_discovery(targets: Iterable[str] | None) -> dict[str, set[str | None]]:
+    """Map each category the selected export types need to the kinds wanted in it."""
+    selected = set(ALL_TARGETS if targets is None else targets)
+    plan: dict[str, set[str | None]] = {}
+    for (category, kind), (target_type, _) in EXPORT_BUCKETS.items():
+        if target_type in selected:
+            plan.setdefault(category, set()).add(kind)
+    return plan
+
 
-    yield str(top), dirs, files
-    for d in dirs:
-        yield from _safe_walk(Path(d))
+# Candidate paths per category, relative to the job folder, for probe mode.
+# {mark} is the mark as it came from SQL; {rev} matches any revision suffix.
+DEFAULT_PROBE_TEMPLATES = {
+    "pdf": [
+        "Drawings/Fabrication/{mark}.pdf",
+        "Drawings/Parts/{mark}.pdf",
+        "Drawings/Fabrication/{mark}-{rev}.pdf",
+        "Drawings/Parts/{mark}-{rev}.pdf",
+    ],
+}
 
+_REV = re.compile(r"[0-9A-Za-z]+")
 
-def find_all_files_for_marks(job_code: int, mainmarks: list[str], parts: list[str]):
+
+def _probe_template(job_folder: Path, template: str, mark: str, listings: dict[Path, list[tuple[str, str]]],
+                    backend) -> str | None:
     """
-    Scan NC and Drawings drives for files matching provided marks.
+    Return the path `template` resolves to for `mark`, or None.
+    Plain templates cost one stat. Templates with {rev} list their folder once per
+    scan (cached in `listings`) and match names against it case-insensitively.
     """
-    try:
-        print("Finding Files:")
-        mm_set = {m.lower() for m in mainmarks}
-        pt_set = {p.lower() for p in parts}
-
-        # Return which bucket ("mainmark"/"part") AND the actual matched mark string.
-        def match_type_and_mark(file: str) -> tuple[str, str] | None:
-            stem = Path(file).stem.lower()
-            for chunk in re.split(r"[-_ ]+", stem):
-                if chunk in mm_set:
-                    return ("mainmark", chunk)
-                if chunk in pt_set:
-                    return ("part", chunk)
+    if "{rev}" not in template:
+        candidate = job_folder / template.format(mark=mark)
+        try:
+            return str(candidate) if backend.is_file(candidate) else None
+        except OSError:
             return None
 
-        _pdf = {"mainmark": [], "part": []}
-        _nc  = {"mainmark": [], "part": []}
-        _dxf = {"mainmark": [], "part": []}
-        _enc = []
+    rel_dir, _, name_tpl = template.replace("\\", "/").rpartition("/")
+    folder = job_folder / rel_dir if rel_dir else job_folder
+    names = listings.get(folder)
+    if names is None:
+        try:
+            with backend.scandir(folder) as it:
+                names = sorted((entry.name.lower(), entry.name) for entry in it)
+        except OSError:
+            names = []
+        listings[folder] = names
+
+    head, _, tail = name_tpl.lower().partition("{rev}")
+    head = head.format(mark=mark.lower())
+    tail = tail.format(mark=mark.lower())
+    for lower, name in names[bisect.bisect_left(names, (head, "")):]:
+        if not lower.startswith(head):
+            break
+        rev = lower[len(head):len(lower) - len(tail)] if lower.endswith(tail) else ""
+        if _REV.fullmatch(rev):
+            return str(folder / name)
+    return None
+
+
+class FileMatch(NamedTuple):
+    """One discovered file. `kind` and `mark` are None for ENC files."""
+    category: str
+    kind: str | None
+    mark: str | None
+    path: str
+
+
+class ScanProgress(NamedTuple):
+    dirs_visited: int
+    files_seen: int
+
+
+class FileDiscovery:
+    """
+    Streaming scan of the NC and Drawings drives for files matching provided marks.
+    Yields FileMatch and ScanProgress events; result() returns the collected dict once exhausted.
+    """
 
+    def __init__(self, job_code: int, mainmarks: list[str], parts: list[str], use_index: bool = True,
+                 walk_workers: int = DEFAULT_WALK_WORKERS, all_matches: bool = False,
+                 progress_every: int = 50, targets: Iterable[str] | None = None,
+                 probe: bool = False, probe_templates: dict[str, list[str]] | None = None,
+                 first_hit: bool = False, exclude: Iterable[str] = DEFAULT_EXCLUDES,
+                 max_depth: int | None = None, backend=None):
+        self.job_code = job_code
+        self.backend = backend or get_backend()
+        self.plan = plan_discovery(targets)
+        if first_hit:
+            self.plan.pop("enc", None)  # ENC files have no marks; listing them all would defeat the early stop
+        self.mm_set = {str(m).strip().lower() for m in mainmarks}
+        self.pt_set = {str(p).strip().lower() for p in parts}
+        # Original spellings, for probing case-sensitive file systems.
+        self._spellings = {str(m).strip().lower(): str(m).strip() for m in [*parts, *mainmarks]}
+        self.use_index = use_index
+        self.walk_workers = walk_workers
+        self.all_matches = all_matches
+        self.progress_every = max(1, progress_every)
+        self.first_hit = first_hit
+        self.exclude = tuple(exclude)
+        self.max_depth = max_depth
+        self.walk_stats = WalkStats()
+        self.unresolved: list[str] = []
+        self.probe_templates = (DEFAULT_PROBE_TEMPLATES if probe_templates is None else probe_templates) if probe else {}
+
+        self.dirs_visited = 0
+        self.files_seen = 0
+
+        self._files = {
+            "nc":  {"mainmark": [], "part": []},
+            "dxf": {"mainmark": [], "part": []},
+            "pdf": {"mainmark": [], "part": []},
+        }
+        self._enc = []
         # Track which marks we actually found per category so we can compute "misses".
-        found_marks = {
+        self._found_marks = {
             "nc":  {"mainmark": set(), "part": set()},
             "dxf": {"mainmark": set(), "part": set()},
             "pdf": {"mainmark": set(), "part": set()},
         }
+        self._full_matcher: MarkMatcher | None = None
+
+    # --- events ---
+    def _tick(self, files: list[str]) -> ScanProgress | None:
+        """Count one directory; return a ScanProgress every `progress_every` dirs."""
+        self.dirs_visited += 1
+        self.files_seen += len(files)
+        if self.dirs_visited % self.progress_every == 0:
+            return ScanProgress(self.dirs_visited, self.files_seen)
+        return None
+
+    def _record(self, category: str, hits: list[tuple[str, str]], path: str):
+        """Collect a matched file once per kind and return its FileMatch events."""
+        wanted = self.plan.get(category, ())
+        hits = [(mtype, mark) for mtype, mark in hits if mtype in wanted]
+        if self.first_hit:
+            hits = [(mtype, mark) for mtype, mark in hits if mark not in self._found_marks[category][mtype]]
+        for mtype in dict.fromkeys(mtype for mtype, _ in hits):
+            self._files[category][mtype].append(path)
+        for mtype, mark in hits:
+            self._found_marks[category][mtype].add(mark)
+        return [FileMatch(category, mtype, mark, path) for mtype, mark in hits]
+
+    def _covered(self, categories: tuple[str, ...]) -> bool:
+        """True once every wanted mark has at least one file in each of `categories`."""
+        for category in categories:
+            for kind in self.plan.get(category, ()):
+                if len(self._found_marks[category][kind]) < len(self._expected(kind)):
+                    return False
+        return True
+
+    # --- matching ---
+    def _expected(self, kind: str) -> set[str]:
+        return self.mm_set if kind == "mainmark" else self.pt_set
+
+    def _matcher(self, category: str) -> MarkMatcher | None:
+        """Matcher for the walk of `category`: every mark, or only those probing missed."""
+        if category not in self.plan:
+            return None
+        if category not in self.probe_templates:
+            if self._full_matcher is None:
+                self._full_matcher = MarkMatcher(self.mm_set, self.pt_set)
+            return self._full_matcher
+
+        found = self._found_marks[category]
+        remaining = {kind: self._expected(kind) - found[kind] if kind in self.plan[category] else set()
+                     for kind in ("mainmark", "part")}
+        return MarkMatcher(remaining["mainmark"], remaining["part"])
+
+    def _match(self, matcher: MarkMatcher | None, file: str) -> list[tuple[str, str]]:
+        """Which buckets ("mainmark"/"part") AND the actual matched mark strings."""
+        if not matcher:
+            return []
+        if self.all_matches:
+            return matcher.match_all(file)
+        hit = matcher.match(file)
+        return [hit] if hit else []
+
+    # --- probing ---
+    def _probe(self, job_folders: list[Path], categories: tuple[str, ...]):
+        """Stat the candidate paths of every wanted mark and yield what exists."""
+        listings: dict[Path, list[tuple[str, str]]] = {}
+        for category in categories:
+            templates = self.probe_templates.get(category) if category in self.plan else None
+            if not templates:
+                continue
+
+            probed = 0
+            for kind in self.plan[category]:
+                for mark in sorted(self._expected(kind)):
+                    spelling = self._spellings.get(mark, mark)
+                    for job_folder in job_folders:
+                        for template in templates:
+                            probed += 1
+                            path = _probe_template(job_folder, template, spelling, listings, self.backend)
+                            if path:
+                                yield from self._record(category, [(kind, mark)], path)
+                                break
+            found = sum(len(v) for v in self._found_marks[category].values())
+            print(f"[PROBE] {category}: {probed} candidates checked, {found} marks found directly")
+
+    def __iter__(self) -> Iterator[FileMatch | ScanProgress]:
+        print("Finding Files:")
+        # First-hit walks stop early, so an index refresh (stat + write per folder) would only slow them down.
+        index = get_file_index() if self.use_index and not self.first_hit else None
+
+        nc_exts = tuple(_CATEGORY_EXTS[c] for c in ("enc", "nc", "dxf") if c in self.plan)
 
         # --- NC side ---
-        print(f"[NC] Scanning drive")
-        for folder in _safe_iterdir(NC_drive):
+        if nc_exts:
+            print(f"[NC] Scanning drive")
+        else:
+            print(f"[NC] Skipped: no NC/DXF/ENC targets selected")
+        nc_folders = get_nc_job_folders(self.job_code, self.backend) if nc_exts else []
+        if nc_exts and not nc_folders:
+            self.unresolved.append("NC")
+        yield from self._probe(nc_folders, ("nc", "dxf"))
+        nc_matcher, dxf_matcher = self._matcher("nc"), self._matcher("dxf")
+        if nc_folders and not ("enc" in self.plan or nc_matcher or dxf_matcher):
+            print(f"[NC] Walk skipped: every mark found by probing")
+            nc_folders = []
+
+        nc_done = False
+        for folder in nc_folders:
+            if nc_done:
+                break
             try:
-                if folder.is_dir() and folder.name.startswith(str(job_code)):
-                    for root, dirs, files in _safe_walk(folder):
-                        for file in files:
-                            lower = file.lower()
-                            filepath = os.path.join(root, file)
-
-                            if lower.endswith(".enc"):
-                                _enc.append(filepath)
-                                continue
-
-                            match = match_type_and_mark(file)
-                            if not match:
-                                continue
-                            mtype, mark = match
-
-                            if lower.endswith(".nc1"):
-                                _nc[mtype].append(filepath)
-                                found_marks["nc"][mtype].add(mark)
-                            elif lower.endswith(".dxf"):
-                                _dxf[mtype].append(filepath)
-                                found_marks["dxf"][mtype].add(mark)
+                tree = _iter_tree_files([folder], index, nc_exts, self.walk_workers,
+                                        self.exclude, self.max_depth, self.walk_stats, self.backend)
+                for root, files in tree:
+                    if progress := self._tick(files):
+                        yield progress
+
+                    for file in files:
+                        lower = file.lower()
+                        filepath = os.path.join(root, file)
+
+                        if lower.endswith(".enc"):
+                            if "enc" in self.plan:
+                                self._enc.append(filepath)
+                                yield FileMatch("enc", None, None, filepath)
+                            continue
+
+                        if lower.endswith(".nc1"):
+                            yield from self._record("nc", self._match(nc_matcher, file), filepath)
+                        elif lower.endswith(".dxf"):
+                            yield from self._record("dxf", self._match(dxf_matcher, file), filepath)
+
+                    if self.first_hit and self._covered(("nc", "dxf")):
+                        print(f"[NC] Every mark covered; stopping walk early")
+                        nc_done = True
+                        tree.close()
+                        break
             except Exception as e:
                 print(f"[WARN] NC folder skipped: {folder} :: {e}")
+                self.walk_stats.record_error("scandir", str(folder), e)
 
         # --- Drawing side ---
-        print(f"[DRAWINGS] Scanning drive")
-        job_prefix = str(job_code)
-        for job_folder in _safe_iterdir(drawing_drive):
+        if "pdf" in self.plan:
+            print(f"[DRAWINGS] Scanning drive")
+        else:
+            print(f"[DRAWINGS] Skipped: no PDF targets selected")
+        job_folders = get_drawing_job_folders(self.job_code, self.backend) if "pdf" in self.plan else []
+        if "pdf" in self.plan and not job_folders:
+            self.unresolved.append("Drawings")
+        yield from self._probe(job_folders, ("pdf",))
+        pdf_matcher = self._matcher("pdf")
+        if job_folders and not pdf_matcher:
+            print(f"[DRAWINGS] Walk skipped: every mark found by probing")
+            job_folders = []
+
+        pdf_done = False
+        for job_folder in job_folders:
+            if pdf_done:
+                break
             try:
-                if not (job_folder.is_dir() and job_folder.name.startswith(job_prefix)):
-                    continue
-
                 parts_dir = job_folder / "Drawings" / "Parts"
                 fab_dir   = job_folder / "Drawings" / "Fabrication"
 
-                for base in (parts_dir, fab_dir):
-                    if not base.exists():
-                        continue
+                bases = [base for base in (parts_dir, fab_dir) if self.backend.is_dir(base)]
+                if not bases:
+                    continue
+
+                tree = _iter_tree_files(bases, index, (".pdf",), self.walk_workers,
+                                        self.exclude, self.max_depth, self.walk_stats, self.backend)
+                for root, files in tree:
+                    if progress := self._tick(files):
+                        yield progress
+
+                    for file in files:
+                        if not file.lower().endswith(".pdf"):
+                            continue
 
-                    for root, dirs, files in _safe_walk(base):
-                        for file in files:
-                            if not file.lower().endswith(".pdf"):
-                                continue
+                        hits = self._match(pdf_matcher, file)
+                        if hits:
+                            yield from self._record("pdf", hits, os.path.join(root, file))
 
-                            match = match_type_and_mark(file)
-                            if match:
-                                mtype, mark = match
-                                path = os.path.join(root, file)
-                                _pdf[mtype].append(path)
-                                found_marks["pdf"][mtype].add(mark)
+                    if self.first_hit and self._covered(("pdf",)):
+                        print(f"[DRAWINGS] Every mark covered; stopping walk early")
+                        pdf_done = True
+                        tree.close()
+                        break
 
             except Exception as e:
                 print(f"[WARN] Job folder skipped: {job_folder} :: {e}")
+                self.walk_stats.record_error("scandir", str(job_folder), e)
+
+        if self.walk_stats.dirs_visited:
+            print(f"[WALK] {self.walk_stats.summary()}")
+        yield ScanProgress(self.dirs_visited, self.files_seen)
 
-        # ---- compute miss buckets (expected marks that had zero hits in each category) ----
-        mm_all = set(mm_set)
-        pt_all = set(pt_set)
+    @property
+    def errors(self) -> int:
+        """Folders that could not be read, counting a side whose job folders did not resolve as one."""
+        return self.walk_stats.error_count + len(self.unresolved)
 
+    # --- collected result ---
+    def result(self) -> dict[str, Any]:
+        # ---- compute miss buckets (expected marks that had zero hits in each requested category) ----
+        expected = {"mainmark": self.mm_set, "part": self.pt_set}
         misses = {
-            "nc": {
-                "mainmark": sorted(mm_all - found_marks["nc"]["mainmark"]),
-                "part":     sorted(pt_all - found_marks["nc"]["part"]),
-            },
-            "dxf": {
-                "mainmark": sorted(mm_all - found_marks["dxf"]["mainmark"]),
-                "part":     sorted(pt_all - found_marks["dxf"]["part"]),
-            },
-            "pdf": {
-                "mainmark": sorted(mm_all - found_marks["pdf"]["mainmark"]),
-                "part":     sorted(pt_all - found_marks["pdf"]["part"]),
-            },
+            cat: {
+                kind: sorted(expected[kind] - self._found_marks[cat][kind])
+                for kind in ("mainmark", "part") if kind in self.plan[cat]
+            }
+            for cat in ("nc", "dxf", "pdf") if cat in self.plan
         }
 
         return {
-            "nc":  {k: sorted(v) for k, v in _nc.items()},
-            "dxf": {k: sorted(v) for k, v in _dxf.items()},
-            "enc": sorted(_enc),
-            "pdf": {k: sorted(v) for k, v in _pdf.items()},
+            "nc":  {k: sorted(v) for k, v in self._files["nc"].items()},
+            "dxf": {k: sorted(v) for k, v in self._files["dxf"].items()},
+            "enc": sorted(self._enc),
+            "pdf": {k: sorted(v) for k, v in self._files["pdf"].items()},
             "misses": misses,
+            "walk_errors": self.errors,
         }
+
+
+def find_all_files_for_marks(job_code: int, mainmarks: list[str], parts: list[str], use_index: bool = True,
+                             walk_workers: int = DEFAULT_WALK_WORKERS, all_matches: bool = False,
+                             targets: Iterable[str] | None = None, first_hit: bool = False):
+    """
+    Scan NC and Drawings drives for files matching provided marks.
+    With `use_index`, folder contents come from the persistent file index,
+    which only re-lists directories that changed since the last scan.
+    `walk_workers` bounds how many share directories are listed at once.
+    With `all_matches`, a file counts toward every mark in its name, not just the first.
+    `targets` limits discovery to the selected export types (default: all).
+    `first_hit` stops each walk once every mark has a file (quick presence check) and skips ENC files.
+    Thin wrapper that drains a FileDiscovery stream.
+    """
+    try:
+        discovery = FileDiscovery(job_code, mainmarks, parts, use_index=use_index,
+                                  walk_workers=walk_workers, all_matches=all_matches, targets=targets,
+                                  first_hit=first_hit)
+        for _ in discovery:
+            pass
+        return discovery.result()
     except Exception as e:
         print(f"[ERROR] Failed to gather files: {e}")
         return {
@@ -197,14 +453,69 @@ def check_for_misses(found_report):
         return misses
     return {}
 
-def sort_to_dirs(types: list[str], all_files: dict[str, Any], output_root: Path = Path("files"), overwrite: bool = False):
+def _bucket_dirs(types: list[str], output_root: Path) -> list[Path]:
+    """Export folders that belong to the selected target types."""
+    return [output_root / subdir for target_type, subdir in dict.fromkeys(EXPORT_BUCKETS.values())
+            if target_type in types]
+
+
+def _prune_if_complete(engine: CopyEngine, types: list[str], output_root: Path):
+    """Remove stale files, but only after an export that saw every source folder and copied everything."""
+    result = engine.result
+    if result.failed or result.walk_errors:
+        print(f"[sync] Not removing stale files: {len(result.failed)} failed, "
+              f"{result.walk_errors} unreadable folders")
+        return
+    engine.prune(_bucket_dirs(types, output_root))
+
+
+def sort_stream_to_dirs(types: list[str], discovery: Iterable, output_root: Path,
+                        overwrite: bool = False, on_progress=None, backend=None,
+                        copy_workers: int = DEFAULT_COPY_WORKERS, sync: bool = False,
+                        remove_stale: bool = False, verify_hash: bool = False,
+                        on_copy_progress=None) -> CopyResult:
+    """Copy files as a FileDiscovery yields them, with the same layout and options as sort_to_dirs."""
+    print(f"[sort_stream_to_dirs] Copying to: {output_root} | Overwrite: {overwrite} | Sync: {sync}")
+    output_root.mkdir(parents=True, exist_ok=True)
+    backend = backend or getattr(discovery, "backend", None) or get_backend()
+
+    copied: set[tuple[str, str]] = set()
+    with ExportJournal(output_root) as journal:
+        with CopyEngine(overwrite, copy_workers, backend, sync=sync, verify_hash=verify_hash,
+                        on_progress=on_copy_progress, journal=journal) as engine:
+            for event in discovery:
+                if isinstance(event, ScanProgress):
+                    if on_progress:
+                        on_progress(event)
+                    continue
+
+                target_type, subdir = EXPORT_BUCKETS.get((event.category, event.kind), (None, None))
+                if target_type not in types or (subdir, event.path) in copied:
+                    continue
+                copied.add((subdir, event.path))
+                engine.submit(event.path, output_root / subdir)
+
+        engine.result.walk_errors = getattr(discovery, "errors", 0)
+        if sync and remove_stale:
+            _prune_if_complete(engine, types, output_root)
+        journal.finish()  # failed files were never journaled; the next export retries them
+    print(f"[sort_stream_to_dirs] Complete: {engine.result.summary()}")
+    return engine.result
+
+
+def sort_to_dirs(types: list[str], all_files: dict[str, Any], output_root: Path = Path("files"), overwrite: bool = False,
+                 backend=None, copy_workers: int = DEFAULT_COPY_WORKERS, sync: bool = False,
+                 remove_stale: bool = False, verify_hash: bool = False, on_copy_progress=None) -> CopyResult:
     """
     Copy discovered files into an output folder structure.
-    Only creates subfolders when there are files to copy.
-    Honors `overwrite` flag to control replacement of existing files.
+    Only creates subfolders when there are files to copy; failures are returned, not raised.
     """
-    print(f"[sort_to_dirs] Copying to: {output_root} | Overwrite: {overwrite}")
+    print(f"[sort_to_dirs] Copying to: {output_root} | Overwrite: {overwrite} | Sync: {sync}")
     output_root.mkdir(parents=True, exist_ok=True)
+    journal = ExportJournal(output_root)
+    journal.open()
+    engine = CopyEngine(overwrite, copy_workers, backend, sync=sync, verify_hash=verify_hash,
+                        on_progress=on_copy_progress, journal=journal)
 
     def has_files(group: Any) -> bool:
         """True only if group is a non-empty iterable (and not a str/bytes)."""
@@ -226,23 +537,8 @@ def sort_to_dirs(types: list[str], all_files: dict[str, Any], output_root: Path
             return
 
         target_dir = output_root / subdir
-        target_dir.mkdir(parents=True, exist_ok=True)
-
         for path in file_list:
-            p = Path(path)
-            if not p.exists():
-                print(f"[WARNING] File {p} does not exist")
-                continue
-
-            dest = target_dir / p.name
-            if dest.exists() and not overwrite:
-                print(f"[SKIP] File exists and overwrite is False: {dest}")
-                continue
-
-            try:
-                shutil.copy2(p, dest)  # preserve mtime/metadata
-            except Exception as e:
-                print(f"[ERROR] Failed to copy {p}: {e}")
+            engine.submit(path, target_dir)
 
     def maybe_copy(group: Any, dest: str) -> bool:
         if has_files(group):
@@ -250,30 +546,64 @@ def sort_to_dirs(types: list[str], all_files: dict[str, Any], output_root: Path
             return True
         return False
 
-    # --- NC ---
-    if "NC" in types:
-        nc = all_files.get("nc") or {}
-        maybe_copy(nc.get("part"), "NC/PARTS")
-        maybe_copy(nc.get("mainmark"), "NC/ASSEMBLIES")
-
-    # --- DXF ---
-    if "DXF" in types:
-        dxf = all_files.get("dxf") or {}
-        maybe_copy(dxf.get("part"), "DXF/PARTS")
-        maybe_copy(dxf.get("mainmark"), "DXF/ASSEMBLIES")
-
-    # --- ENC ---
-    if "ENC" in types:
-        enc = all_files.get("enc")
-        maybe_copy(enc, "ENC")
-
-    # --- PDF: PART / ASSEMBLY ---
-    if "PART" in types:
-        maybe_copy(all_files.get("pdf", {}).get("part"), "PDF/PARTS")
-
-    if "ASSEMBLY" in types:
-        maybe_copy(all_files.get("pdf", {}).get("mainmark"), "PDF/ASSEMBLIES")
-
-    print("[sort_to_dirs] Complete")
-
+    try:
+        # --- NC ---
+        if "NC" in types:
+            nc = all_files.get("nc") or {}
+            maybe_copy(nc.get("part"), "NC/PARTS")
+            maybe_copy(nc.get("mainmark"), "NC/ASSEMBLIES")
+
+        # --- DXF ---
+        if "DXF" in types:
+            dxf = all_files.get("dxf") or {}
+            maybe_copy(dxf.get("part"), "DXF/PARTS")
+            maybe_copy(dxf.get("mainmark"), "DXF/ASSEMBLIES")
+
+        # --- ENC ---
+        if "ENC" in types:
+            enc = all_files.get("enc")
+            maybe_copy(enc, "ENC")
+
+        # --- PDF: PART / ASSEMBLY ---
+        if "PART" in types:
+            maybe_copy(all_files.get("pdf", {}).get("part"), "PDF/PARTS")
+
+        if "ASSEMBLY" in types:
+            maybe_copy(all_files.get("pdf", {}).get("mainmark"), "PDF/ASSEMBLIES")
+
+        result = engine.close()
+        result.walk_errors = all_files.get("walk_errors", 0)
+        if sync and remove_stale:
+            _prune_if_complete(engine, types, output_root)
+        journal.finish()  # failed files were never journaled; the next export retries them
+    finally:
+        engine.close()
+        journal.close()
+    print(f"[sort_to_dirs] Complete: {result.summary()}")
+    return result
+
+
+def zip_tree(src_dir: Path, zip_path: Path, backend=None) -> Path:
+    """
+    Write `src_dir` into `zip_path` with `src_dir.name` as the top-level folder,
+    reading the tree through `backend` (default: local disk).
+    """
+    backend = backend or LocalBackend(src_dir, src_dir)
+    src_dir = Path(src_dir)
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for root, dirs, files in walk_entries([src_dir], backend=backend):
+            rel_root = Path(src_dir.name) / Path(root).relative_to(src_dir)
+            if not files and not dirs:
+                zf.writestr(f"{rel_root.as_posix()}/", b"")
+            for entry in files:
+                if entry.name == JOURNAL_NAME or is_temp_copy(entry.name):
+                    continue
+                st = entry.stat()
+                date_time = max(time.localtime(st.st_mtime)[:6], (1980, 1, 1, 0, 0, 0))
+                info = zipfile.ZipInfo((rel_root / entry.name).as_posix(), date_time)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                with backend.open_read(entry.path) as src, \
+                        zf.open(info, "w", force_zip64=st.st_size > zipfile.ZIP64_LIMIT) as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+    return Path(zip_path)
 
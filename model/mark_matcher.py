@@ -0,0 +1,123 @@
+import re
+from collections import deque
+from collections.abc import Iterable
+from pathlib import Path
+
+_SEPARATORS = re.compile(r"[-_ ]+")
+_SEP = " "
+
+KINDS = ("mainmark", "part")
+
+
+def normalize(text: str) -> str:
+    """Lower-case and collapse runs of '-', '_' and ' ' into a single separator."""
+    return _SEPARATORS.sub(_SEP, text.strip().lower()).strip(_SEP)
+
+
+class MarkMatcher:
+    """
+    Aho-Corasick matcher over normalized file stems.
+
+    Built once per scan from the mainmark and part lists. Marks may themselves
+    contain '-', '_' or spaces; a hit only counts when it starts and ends on a
+    token boundary, so 'B1' matches 'B1-rev2.pdf' but not 'B10.pdf'. Scanning a
+    name is linear in its length plus the number of hits.
+    """
+
+    def __init__(self, mainmarks: Iterable[str], parts: Iterable[str]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[int]] = [[]]
+        # pattern id -> (normalized length, [(kind, mark), ...]) with mainmarks first
+        self._patterns: list[tuple[int, list[tuple[str, str]]]] = []
+        self._ids: dict[str, int] = {}
+
+        for kind, marks in (("mainmark", mainmarks), ("part", parts)):
+            for mark in marks:
+                self._add(kind, mark)
+        self._build_links()
+
+    def __bool__(self) -> bool:
+        return bool(self._patterns)
+
+    def _add(self, kind: str, mark: str):
+        mark = str(mark).strip().lower()
+        key = normalize(mark)
+        if not key:
+            return
+
+        pid = self._ids.get(key)
+        if pid is None:
+            pid = len(self._patterns)
+            self._ids[key] = pid
+            self._patterns.append((len(key), []))
+
+            node = 0
+            for ch in key:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append(pid)
+
+        owners = self._patterns[pid][1]
+        if (kind, mark) not in owners:
+            owners.append((kind, mark))
+
+    def _build_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child].extend(self._out[self._fail[child]])
+
+    def _hits(self, filename: str) -> list[tuple[int, int, int]]:
+        """Return (start, -length, pattern id) for every token-aligned hit in the stem."""
+        text = normalize(Path(filename).stem)
+        n = len(text)
+        hits = []
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            if not self._out[node]:
+                continue
+            if i + 1 < n and text[i + 1] != _SEP:
+                continue
+            for pid in self._out[node]:
+                length = self._patterns[pid][0]
+                start = i + 1 - length
+                if start == 0 or text[start - 1] == _SEP:
+                    hits.append((start, -length, pid))
+        return hits
+
+    def match(self, filename: str) -> tuple[str, str] | None:
+        """
+        Return (kind, mark) for the left-most mark in the file name, preferring the
+        longest mark at that position and mainmarks over parts, or None.
+        """
+        hits = self._hits(filename)
+        if not hits:
+            return None
+        _, _, pid = min(hits)
+        return self._patterns[pid][1][0]
+
+    def match_all(self, filename: str) -> list[tuple[str, str]]:
+        """Return every (kind, mark) found in the file name, left to right."""
+        found: list[tuple[str, str]] = []
+        for _, _, pid in sorted(self._hits(filename)):
+            for owner in self._patterns[pid][1]:
+                if owner not in found:
+                    found.append(owner)
+        return found
@@ -0,0 +1,51 @@
+import bisect
+from collections.abc import Iterable
+
+
+def _number(package: str) -> str:
+    return package.split("#", 1)[1] if "#" in package else ""
+
+
+class PackageIndex:
+    """
+    Sorted in-memory prefix index of one job's package names.
+
+    Lookups are case-insensitive and match either the full name ("SUB#12" ->
+    SUB#120, SUB#125) or just the number after '#' ("12" -> SUB#120, PKG#12),
+    each with a binary search, so completions stay instant while typing.
+    Only for suggestions: packages known to MySQL alone or without parts are missing.
+    """
+
+    def __init__(self, job_code: int, packages: Iterable[str]):
+        self.job_code = job_code
+        self.packages = sorted({str(p).strip().upper() for p in packages if str(p).strip()})
+        self._by_name = self.packages
+        self._by_number = sorted((_number(p), p) for p in self.packages)
+
+    def __len__(self) -> int:
+        return len(self.packages)
+
+    def __contains__(self, package: str) -> bool:
+        key = str(package).strip().upper()
+        i = bisect.bisect_left(self._by_name, key)
+        return i < len(self._by_name) and self._by_name[i] == key
+
+    def complete(self, prefix: str, limit: int = 50) -> list[str]:
+        """Packages starting with `prefix` (name or number), name matches first."""
+        key = str(prefix).strip().upper()
+        if not key:
+            return self.packages[:limit]
+
+        found = []
+        i = bisect.bisect_left(self._by_name, key)
+        while i < len(self._by_name) and self._by_name[i].startswith(key) and len(found) < limit:
+            found.append(self._by_name[i])
+            i += 1
+
+        if key.isdigit():
+            i = bisect.bisect_left(self._by_number, (key, ""))
+            while i < len(self._by_number) and self._by_number[i][0].startswith(key) and len(found) < limit:
+                if self._by_number[i][1] not in found:
+                    found.append(self._by_number[i][1])
+                i += 1
+        return found
@@ -0,0 +1,142 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+from model.file_index import INDEX_PATH
+
+CACHE_PATH = INDEX_PATH.with_name("pkg_cache.sqlite3")
+
+PKG_CACHE_TTL = 600.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS packages (
+    job        INTEGER NOT NULL,
+    package    TEXT NOT NULL,
+    mainmarks  TEXT NOT NULL,
+    parts      TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (job, package)
+);
+
+CREATE TABLE IF NOT EXISTS jobs (
+    job         INTEGER PRIMARY KEY,
+    hydrated_at REAL NOT NULL
+);
+"""
+
+
+class PackageContents(NamedTuple):
+    mainmarks: list[str]
+    parts: list[str]
+    fetched_at: float
+    stale: bool = False
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class PackageCache:
+    """
+    On-disk cache of build_pkg_content_list results keyed by (job, package).
+
+    Entries never expire on their own: callers decide with a TTL whether an
+    entry is fresh enough, and an old entry is still available to fall back
+    on when the databases cannot be reached.
+    """
+
+    def __init__(self, db_path: Path = CACHE_PATH):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30.0, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    @staticmethod
+    def _key(job_code: int | str, pkg_code: str) -> tuple[int, str]:
+        return int(job_code), str(pkg_code).strip().upper()
+
+    def get(self, job_code: int | str, pkg_code: str) -> PackageContents | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT mainmarks, parts, fetched_at FROM packages WHERE job = ? AND package = ?",
+                self._key(job_code, pkg_code),
+            ).fetchone()
+        if row is None:
+            return None
+        return PackageContents(json.loads(row[0]), json.loads(row[1]), row[2])
+
+    def put(self, job_code: int | str, pkg_code: str, mainmarks: list[str], parts: list[str]) -> PackageContents:
+        entry = PackageContents(list(mainmarks), list(parts), time.time())
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO packages (job, package, mainmarks, parts, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (*self._key(job_code, pkg_code), json.dumps(entry.mainmarks), json.dumps(entry.parts),
+                 entry.fetched_at),
+            )
+        return entry
+
+    def put_job(self, job_code: int | str, contents: dict[str, tuple[list[str], list[str]]]):
+        """Store every package of a job in one transaction and remember when the job was loaded."""
+        now = time.time()
+        job = int(job_code)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO packages (job, package, mainmarks, parts, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                    [(*self._key(job, pkg), json.dumps(list(m)), json.dumps(list(p)), now)
+                     for pkg, (m, p) in contents.items()],
+                )
+                self._conn.execute("INSERT OR REPLACE INTO jobs (job, hydrated_at) VALUES (?, ?)", (job, now))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def job_age(self, job_code: int | str) -> float | None:
+        """Seconds since the whole job was last loaded, or None if it never was."""
+        with self._lock:
+            row = self._conn.execute("SELECT hydrated_at FROM jobs WHERE job = ?", (int(job_code),)).fetchone()
+        return None if row is None else time.time() - row[0]
+
+    def packages(self, job_code: int | str) -> list[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT package FROM packages WHERE job = ? ORDER BY package",
+                                      (int(job_code),)).fetchall()
+        return [r[0] for r in rows]
+
+    def invalidate(self, job_code: int | str | None = None, pkg_code: str | None = None):
+        """Drop one package, every package of a job, or (with no arguments) everything."""
+        with self._lock:
+            if job_code is None:
+                self._conn.execute("DELETE FROM packages")
+                self._conn.execute("DELETE FROM jobs")
+            elif pkg_code is None:
+                self._conn.execute("DELETE FROM packages WHERE job = ?", (int(job_code),))
+                self._conn.execute("DELETE FROM jobs WHERE job = ?", (int(job_code),))
+            else:
+                self._conn.execute("DELETE FROM packages WHERE job = ? AND package = ?",
+                                   self._key(job_code, pkg_code))
+
+
+_default_cache: PackageCache | None = None
+_default_lock = threading.Lock()
+
+
+def get_pkg_cache() -> PackageCache | None:
+    """Process-wide package cache, or None when the database cannot be opened."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            try:
+                _default_cache = PackageCache()
+            except (sqlite3.Error, OSError) as e:
+                print(f"[WARN] package cache disabled :: {e}")
+                return None
+        return _default_cache
@@ -6,6 +6,7 @@ def write_miss_report(
         job_code: int | str,
         misses: dict[str, dict[str, list[str]]],
         failed_paths: list[str] | None = None,
+        walk_errors: int = 0,
 ):
 
     failed_paths = failed_paths or []
@@ -22,9 +23,14 @@ def write_miss_report(
 
     section("By Category / Type (Not Found)")
 
+    # Only categories that were requested for this export carry miss buckets.
     for cat in ("nc", "dxf", "pdf"):
-        cat_misses = misses.get(cat, {})
+        if cat not in misses:
+            continue
+        cat_misses = misses[cat]
         for subcat in ("mainmark", "part"):
+            if subcat not in cat_misses:
+                continue
             items = sorted(set(cat_misses.get(subcat, [])))
             label = f"{cat} {subcat.capitalize()}"
             if items:
@@ -42,6 +48,11 @@ def write_miss_report(
     else:
         lines.append("All files Copied Successfully")
 
+    if walk_errors:
+        lines.append("")
+        section("Unreadable Folders")
+        lines.append(f"{walk_errors} folder(s) could not be read; files in them may be missing above.")
+
     output_root.mkdir(parents=True, exist_ok=True)
     report_path = output_root / "JobScan_Miss_Report.txt"
     report_path.write_text("\n".join(lines), encoding="utf-8")
@@ -0,0 +1,250 @@
+import re
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+
+from model.SQL_conn import CircuitBreaker, ConnectionPool, SQLBackend
+
+# Result-set shapes of the production procedures. Only the column positions the
+# query code reads (and the getparts package column) have to match.
+GETPARTS_COLUMNS = ("PartID", "Job", "MainMark", "Package", "Quantity", "PartMark")
+MAIN_COLUMNS = ("MainID", "Job", "Package", "Sequence", "Quantity", "MainMark")
+PARTS_COLUMNS = ("PartID", "Job", "Package", "MainMark", "Sequence", "Quantity", "PartMark")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS mainmarks (
+    job      INTEGER NOT NULL,
+    package  TEXT NOT NULL,
+    mark     TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS parts (
+    job       INTEGER NOT NULL,
+    package   TEXT NOT NULL,
+    mainmark  TEXT,
+    part      TEXT NOT NULL,
+    in_ms_sql INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS mainmarks_pkg ON mainmarks(job, package);
+CREATE INDEX IF NOT EXISTS parts_pkg ON parts(job, package);
+"""
+
+_GETPARTS = re.compile(r"^EXEC\s+fabtracker\.getparts\s+(\S+)\s*,\s*(\S+)\s*,\s*null$", re.I)
+_CALL = re.compile(r"^CALL\s+fabrication\.(MFC_Get(?:Main|Parts)_InPackage)\s*\((.*)\)$", re.I)
+_SELECT_AS = re.compile(r"^SELECT\s+(\S+)\s+AS\s+(\w+)$", re.I)
+_SELECT_ONE = re.compile(r"^SELECT\s+1$", re.I)
+
+
+def _description(columns: Iterable[str]):
+    return [(name, None, None, None, None, None, None) for name in columns]
+
+
+class _ResultSet:
+    def __init__(self, columns: Iterable[str] | None, rows: list[tuple]):
+        self.description = _description(columns) if columns is not None else None
+        self.rows = rows
+        self.pos = 0
+
+    def fetchmany(self, size: int = 1) -> list[tuple]:
+        chunk = self.rows[self.pos:self.pos + size]
+        self.pos += len(chunk)
+        return chunk
+
+    def fetchall(self) -> list[tuple]:
+        chunk = self.rows[self.pos:]
+        self.pos = len(self.rows)
+        return chunk
+
+    def fetchone(self):
+        chunk = self.fetchmany(1)
+        return chunk[0] if chunk else None
+
+
+class _StandInCursor:
+    """DB-API cursor that answers the JobScan procedures from the stand-in tables."""
+
+    def __init__(self, conn: "_StandInConnection"):
+        self._conn = conn
+        self._sets: list[_ResultSet] = []
+        self._stored: list[_ResultSet] = []
+        self.arraysize = 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        self._sets = []
+        self._stored = []
+
+    @property
+    def _current(self) -> _ResultSet | None:
+        return self._sets[0] if self._sets else None
+
+    @property
+    def description(self):
+        return self._current.description if self._current else None
+
+    def execute(self, sql: str, params: Iterable = ()):
+        self._conn.round_trip()
+        params = list(params or ())
+        self._sets = []
+        for statement in (s.strip() for s in sql.split(";")):
+            if statement:
+                used = statement.count(self._conn.placeholder)
+                self._sets.extend(self._run(statement, params[:used]))
+                params = params[used:]
+        return self
+
+    def callproc(self, name: str, args: Iterable = ()):
+        self._conn.round_trip()
+        proc = name.split(".")[-1]
+        self._stored = [rs for rs in self._call(proc, list(args)) if rs.description is not None]
+        return args
+
+    def stored_results(self):
+        return iter(self._stored)
+
+    def fetchmany(self, size: int | None = None):
+        return self._current.fetchmany(size or self.arraysize) if self._current else []
+
+    def fetchall(self):
+        return self._current.fetchall() if self._current else []
+
+    def fetchone(self):
+        return self._current.fetchone() if self._current else None
+
+    def nextset(self):
+        if self._sets:
+            self._sets.pop(0)
+        return True if self._sets else None
+
+    # --- statement emulation ---
+    def _run(self, statement: str, params: list) -> list[_ResultSet]:
+        if m := _GETPARTS.match(statement):
+            values = iter(params)
+            job, pkg = (next(values) if arg in ("?", "%s") else None for arg in m.groups())
+            return [self._getparts(job, pkg)]
+        if m := _CALL.match(statement):
+            return self._call(m.group(1), params)
+        if m := _SELECT_AS.match(statement):
+            return [_ResultSet([m.group(2)], [(params[0] if params else m.group(1),)])]
+        if _SELECT_ONE.match(statement):
+            return [_ResultSet(["1"], [(1,)])]
+        raise sqlite3.ProgrammingError(f"stand-in does not emulate: {statement}")
+
+    def _getparts(self, job, pkg) -> _ResultSet:
+        sql = "SELECT rowid, job, mainmark, package, 1, part FROM parts WHERE in_ms_sql = 1 AND job = ?"
+        args = [int(job)]
+        if pkg is not None:
+            sql += " AND package = ?"
+            args.append(str(pkg).upper())
+        return _ResultSet(GETPARTS_COLUMNS, self._conn.standin.query(sql, args))
+
+    def _call(self, proc: str, args: list) -> list[_ResultSet]:
+        job, pkg = int(args[0]), str(args[1]).upper()
+        if proc.lower() == "mfc_getmain_inpackage":
+            rows = self._conn.standin.query(
+                "SELECT rowid, job, package, 1, 1, mark FROM mainmarks WHERE job = ? AND package = ?", [job, pkg])
+            columns = MAIN_COLUMNS
+        else:
+            rows = self._conn.standin.query(
+                "SELECT rowid, job, package, mainmark, 1, 1, part FROM parts WHERE job = ? AND package = ?",
+                [job, pkg])
+            columns = PARTS_COLUMNS
+        # MySQL follows every CALL with an empty status result.
+        return [_ResultSet(columns, rows), _ResultSet(None, [])]
+
+
+class _StandInConnection:
+    def __init__(self, standin: "SQLiteStandIn", dialect: str):
+        self.standin = standin
+        self.placeholder = "?" if dialect == "ms_sql" else "%s"
+        self.timeout = 0
+        self.closed = False
+
+    def round_trip(self):
+        if self.closed:
+            raise sqlite3.ProgrammingError("connection closed")
+        self.standin.wait(self.standin.latency)
+
+    def cursor(self):
+        return _StandInCursor(self)
+
+    def ping(self, reconnect: bool = False):
+        self.round_trip()
+
+    def close(self):
+        self.closed = True
+
+
+class SQLiteStandIn:
+    """
+    SQLite-backed stand-in for Strider (MySQL) and Voltron (SQL Server).
+
+    Emulates fabtracker.getparts, MFC_GetMain_InPackage and
+    MFC_GetParts_InPackage with the production column positions and result
+    sets (every CALL is followed by an empty status set, as on MySQL), for
+    tests and benchmarks on a machine without the servers. `latency` is added
+    to every round trip and `connect_latency` to every new connection, so the
+    pooled and concurrent paths cost what they would over the network.
+    """
+
+    def __init__(self, db_path: str = ":memory:", latency: float = 0.0, connect_latency: float = 0.0):
+        self.db_path = db_path
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.connects = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._db.executescript(_SCHEMA)
+
+    def __repr__(self):
+        return f"SQLiteStandIn({self.db_path!r}, latency={self.latency})"
+
+    @staticmethod
+    def wait(seconds: float):
+        if seconds:
+            time.sleep(seconds)
+
+    def query(self, sql: str, args: list) -> list[tuple]:
+        with self._lock:
+            return self._db.execute(sql, args).fetchall()
+
+    def add_package(self, job_code: int, pkg_code: str, mainmarks: Iterable[str], parts: Iterable[str],
+                    in_ms_sql: bool = True):
+        """Add a package; with in_ms_sql=False its parts are only found by the MySQL fallback."""
+        pkg = str(pkg_code).upper()
+        with self._lock:
+            self._db.executemany("INSERT INTO mainmarks (job, package, mark) VALUES (?, ?, ?)",
+                                 [(int(job_code), pkg, m) for m in mainmarks])
+            self._db.executemany("INSERT INTO parts (job, package, part, in_ms_sql) VALUES (?, ?, ?, ?)",
+                                 [(int(job_code), pkg, p, int(in_ms_sql)) for p in parts])
+
+    def connect_mysql(self) -> _StandInConnection:
+        return self._connect("mysql")
+
+    def connect_ms_sql(self) -> _StandInConnection:
+        return self._connect("ms_sql")
+
+    def _connect(self, dialect: str) -> _StandInConnection:
+        self.wait(self.connect_latency)
+        with self._lock:
+            self.connects += 1
+        return _StandInConnection(self, dialect)
+
+    def backend(self, **pool_options) -> SQLBackend:
+        """An SQLBackend whose pools open stand-in connections; pass to set_sql_backend()."""
+        def alive(conn) -> bool:
+            return not conn.closed
+
+        return SQLBackend(
+            "stand-in",
+            ConnectionPool("MySQL (stand-in)", self.connect_mysql, alive,
+                           breaker=CircuitBreaker("MySQL (stand-in)"), **pool_options),
+            ConnectionPool("SQL Server (stand-in)", self.connect_ms_sql, alive,
+                           breaker=CircuitBreaker("SQL Server (stand-in)"), **pool_options),
+        )
@@ -0,0 +1,157 @@
+import fnmatch
+import os
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from model.fs_backend import get_backend
+
+DEFAULT_WALK_WORKERS = 8
+
+# Sub-folders that hold old revisions rather than current shop files.
+DEFAULT_EXCLUDES = ("*archive*", "*backup*", "*superseded*")
+
+MAX_RECORDED_ERRORS = 50
+
+
+@dataclass
+class WalkStats:
+    """Counters for one walk; safe to update from walker threads."""
+    dirs_visited: int = 0
+    files_seen: int = 0
+    excluded: int = 0
+    depth_limited: int = 0
+    scandir_errors: int = 0
+    stat_errors: int = 0
+    errors: list[tuple[str, str]] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def record_dir(self, files: int, excluded: int, depth_limited: int):
+        with self._lock:
+            self.dirs_visited += 1
+            self.files_seen += files
+            self.excluded += excluded
+            self.depth_limited += depth_limited
+
+    def record_error(self, kind: str, path: str, exc: Exception):
+        with self._lock:
+            if kind == "scandir":
+                self.scandir_errors += 1
+            else:
+                self.stat_errors += 1
+            if len(self.errors) < MAX_RECORDED_ERRORS:
+                self.errors.append((path, f"{kind}: {exc}"))
+
+    @property
+    def error_count(self) -> int:
+        return self.scandir_errors + self.stat_errors
+
+    def summary(self) -> str:
+        return (f"{self.dirs_visited} dirs, {self.files_seen} files, {self.excluded} excluded, "
+                f"{self.depth_limited} beyond depth, {self.scandir_errors} scandir errors, "
+                f"{self.stat_errors} stat errors")
+
+
+def is_excluded(name: str, exclude: Iterable[str]) -> bool:
+    """True if a directory name matches any exclusion glob (case-insensitive)."""
+    lower = name.lower()
+    return any(fnmatch.fnmatchcase(lower, pattern.lower()) for pattern in exclude)
+
+
+def run_tree(tops: Iterable[Any], visit: Callable[[Any], tuple[Any, list[Any]]],
+             workers: int = DEFAULT_WALK_WORKERS) -> Iterator[Any]:
+    """
+    Drive `visit` over every directory reachable from `tops`.
+
+    `visit(item)` returns (result, child_items). Pending items live on an explicit
+    LIFO work stack, so memory stays flat however deep the tree is. With more than
+    one worker, children are scheduled as soon as their parent is done and sibling
+    directories are listed in parallel; at most `workers` visits are in flight,
+    which keeps the number of outstanding SMB round trips bounded. Results are
+    yielded in completion order.
+    """
+    waiting = list(tops)
+    waiting.reverse()
+
+    if workers <= 1:
+        while waiting:
+            result, children = visit(waiting.pop())
+            waiting.extend(reversed(children))
+            yield result
+        return
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="walk") as pool:
+        running = set()
+        try:
+            while waiting or running:
+                while waiting and len(running) < workers:
+                    running.add(pool.submit(visit, waiting.pop()))
+
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    result, children = fut.result()
+                    waiting.extend(children)
+                    yield result
+        finally:
+            for fut in running:
+                fut.cancel()
+
+
+def _scan_dir(item: tuple[str, int], max_depth: int | None, exclude: tuple[str, ...], stats: WalkStats,
+              backend):
+    """List one directory into DirEntry lists, counting failures instead of raising."""
+    path, depth = item
+    dirs: list[os.DirEntry] = []
+    files: list[os.DirEntry] = []
+    excluded = 0
+    try:
+        with backend.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if exclude and is_excluded(entry.name, exclude):
+                            excluded += 1
+                        else:
+                            dirs.append(entry)
+                    else:
+                        files.append(entry)
+                except OSError as e:
+                    stats.record_error("stat", entry.path, e)
+    except OSError as e:
+        stats.record_error("scandir", path, e)
+        return None, []
+
+    if max_depth is not None and depth >= max_depth:
+        stats.record_dir(len(files), excluded, len(dirs))
+        children = []
+    else:
+        stats.record_dir(len(files), excluded, 0)
+        children = [(d.path, depth + 1) for d in dirs]
+    return (path, dirs, files), children
+
+
+def walk_entries(tops: Iterable[str | Path], workers: int = 1, max_depth: int | None = None,
+                 exclude: Iterable[str] = (), stats: WalkStats | None = None, backend=None):
+    """
+    Walk `tops` and yield (root, dir_entries, file_entries) per directory.
+
+    Entries are the os.DirEntry objects from scandir, so names, types and (on
+    Windows) size/mtime come for free without another stat. `max_depth` limits
+    how far below each top the walk descends (0 = the top only), `exclude` globs
+    prune matching sub-folders, and failures are tallied in `stats`.
+    With `workers` > 1 sibling directories are listed concurrently.
+    Listings go through `backend` (default: the configured file system backend).
+    """
+    stats = stats if stats is not None else WalkStats()
+    exclude = tuple(exclude)
+    backend = backend or get_backend()
+
+    def visit(item):
+        return _scan_dir(item, max_depth, exclude, stats, backend)
+
+    for result in run_tree([(str(t), 0) for t in tops], visit, workers):
+        if result is not None:
+            yield result
@@ -0,0 +1,39 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from model import pkg_cache
+from model.SQL_conn import get_sql_backend, set_sql_backend
+from model.fs_backend import MemoryBackend
+from model.job_folders import invalidate_job_folders
+from model.pkg_cache import PackageCache
+from model.sql_standin import SQLiteStandIn
+
+
+@pytest.fixture
+def share():
+    """Empty MemoryBackend share; the process-wide job-folder cache is cleared around it."""
+    invalidate_job_folders()
+    yield MemoryBackend()
+    invalidate_job_folders()
+
+
+@pytest.fixture
+def standin():
+    """SQLiteStandIn installed as the SQL backend for the duration of a test."""
+    previous = get_sql_backend()
+    db = SQLiteStandIn()
+    set_sql_backend(db.backend())
+    yield db
+    set_sql_backend(previous)
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """Package cache in a temporary folder instead of the user's profile."""
+    pc = PackageCache(tmp_path / "pkg_cache.sqlite3")
+    monkeypatch.setattr(pkg_cache, "_default_cache", pc)
+    return pc
@@ -0,0 +1,144 @@
+import itertools
+
+import pytest
+
+from model.copy_engine import CopyEngine
+from model.export_journal import JOURNAL_NAME, ExportJournal
+from model.fs_backend import MemoryBackend
+from model.main_logic import sort_to_dirs
+
+
+def export(sources, target_dir, **options):
+    with CopyEngine(**options) as engine:
+        for src in sources:
+            engine.submit(src, target_dir)
+    return engine.result
+
+
+def contents(folder):
+    return {p.name: p.read_bytes() for p in folder.iterdir() if p.name != JOURNAL_NAME}
+
+
+@pytest.fixture
+def same_name(tmp_path):
+    """Three different B1.nc1 files and a copy of the first, in different folders."""
+    files = {"J1/a": b"one", "J1/b": b"two!", "J2/a": b"three", "J3/a": b"one"}
+    sources = []
+    for folder, data in files.items():
+        src = tmp_path / "src" / folder / "B1.nc1"
+        src.parent.mkdir(parents=True)
+        src.write_bytes(data)
+        sources.append(src)
+    return sources
+
+
+def test_colliding_names_do_not_depend_on_order(tmp_path, same_name):
+    outcomes = set()
+    for n, order in enumerate(itertools.permutations(same_name)):
+        result = export(order, tmp_path / f"out{n}")
+        assert not result.failed
+        outcomes.add(tuple(sorted(contents(tmp_path / f"out{n}").items())))
+    assert outcomes == {(
+        ("B1 (J2).nc1", b"three"),
+        ("B1 (J3).nc1", b"one"),
+        ("B1 (b).nc1", b"two!"),
+        ("B1.nc1", b"one"),
+    )}
+
+
+def test_identical_content_is_hardlinked(tmp_path, same_name):
+    result = export(same_name, tmp_path / "out")
+    assert result.deduplicated == 1
+    assert (tmp_path / "out" / "B1.nc1").stat().st_nlink == 2
+
+
+def test_new_name_owner_replaces_a_kept_file(tmp_path, same_name):
+    low, high = same_name[0], same_name[2]
+    out = tmp_path / "out"
+    export([high], out)
+    for _ in range(2):
+        result = export([high, low], out)
+        assert contents(out) == {"B1.nc1": b"one", "B1 (J2).nc1": b"three"}
+        assert result.copied + result.skipped == 2
+
+
+def test_sync_recopies_changed_files_only(tmp_path, same_name):
+    out = tmp_path / "out"
+    export(same_name[:2], out, sync=True)
+    same_name[1].write_bytes(b"TWO!!")
+    result = export(same_name[:2], out, sync=True)
+    assert (result.copied, result.skipped) == (1, 1)
+    assert contents(out)["B1 (b).nc1"] == b"TWO!!"
+
+
+def test_progress_has_no_totals_until_close(tmp_path, same_name):
+    seen = []
+    export(same_name, tmp_path / "out", on_progress=seen.append)
+    assert all(p.fraction is None and p.eta is None for p in seen if p.counting)
+    assert not seen[-1].counting and seen[-1].fraction == 1.0
+
+
+@pytest.fixture
+def share():
+    backend = MemoryBackend()
+    for n in range(20):
+        backend.add_file(f"/share/P{n}.nc1", bytes([n]) * 100)
+    return backend
+
+
+def parts(share):
+    return {"nc": {"part": [f"/share/P{n}.nc1" for n in range(20)]}}
+
+
+class Interrupted(Exception):
+    pass
+
+
+def interrupted_after(files: list, count: int):
+    class Listing(list):
+        def __iter__(self):
+            yield from files[:count]
+            raise Interrupted
+    return Listing(files)
+
+
+def test_interrupted_export_resumes(tmp_path, share):
+    out = tmp_path / "job"
+    files = parts(share)["nc"]["part"]
+    with pytest.raises(Interrupted):
+        sort_to_dirs(["NC"], {"nc": {"part": interrupted_after(files, 5)}}, out, overwrite=True, backend=share)
+    assert ExportJournal(out).resuming
+
+    result = sort_to_dirs(["NC"], parts(share), out, overwrite=True, backend=share)
+    assert (result.copied, result.skipped) == (15, 5)
+    assert not ExportJournal(out).resuming
+
+
+def test_resume_keeps_files_the_journal_does_not_list(tmp_path, share):
+    out = tmp_path / "job"
+    files = parts(share)["nc"]["part"]
+    sort_to_dirs(["NC"], parts(share), out, backend=share)
+    with pytest.raises(Interrupted):
+        sort_to_dirs(["NC"], {"nc": {"part": interrupted_after(files, 3)}}, out, backend=share)
+
+    result = sort_to_dirs(["NC"], parts(share), out, backend=share)
+    assert (result.copied, result.skipped) == (0, 20)
+
+
+def test_failed_files_finish_the_journal_and_are_retried(tmp_path, share):
+    out = tmp_path / "job"
+    copy_file = share.copy_file
+
+    def flaky(src, dest):
+        if str(src).endswith("P3.nc1"):
+            raise OSError("share dropped")
+        return copy_file(src, dest)
+
+    share.copy_file = flaky
+    result = sort_to_dirs(["NC"], parts(share), out, backend=share)
+    assert len(result.failed) == 1
+    assert not ExportJournal(out).resuming
+
+    share.copy_file = copy_file
+    result = sort_to_dirs(["NC"], parts(share), out, backend=share)
+    assert (result.copied, result.skipped, result.failed) == (1, 19, [])
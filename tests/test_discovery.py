@@ -0,0 +1,82 @@
+import pytest
+
+from model import main_logic
+from model.file_index import FileIndex
+from model.main_logic import FileDiscovery, FileMatch, ScanProgress
+
+NC = "/mem/NC Files/123 - Plant"
+DRAWINGS = "/mem/Shop Drawings/Jobs/123 - Plant/Drawings"
+
+
+@pytest.fixture
+def job(share):
+    share.add_file(f"{NC}/B1.nc1", b"nc")
+    share.add_file(f"{NC}/B1.dxf", b"dxf")
+    share.add_file(f"{NC}/parts/P1.nc1", b"nc")
+    share.add_file(f"{NC}/parts/P1.dxf", b"dxf")
+    share.add_file(f"{NC}/Archive/P2.nc1", b"old")
+    share.add_file(f"{NC}/layout.enc", b"enc")
+    share.add_file(f"{DRAWINGS}/Fabrication/B1-A.pdf", b"pdf")
+    for n in range(30):
+        share.add_file(f"{NC}/other/sub{n}/X{n}.nc1", b"nc")
+    return share
+
+
+def discover(backend, parts=("P1", "P2"), **options):
+    discovery = FileDiscovery(123, ["B1"], list(parts), use_index=False, walk_workers=2,
+                              backend=backend, **options)
+    events = list(discovery)
+    return discovery, events
+
+
+def test_streams_matches_and_collects_result(job):
+    discovery, events = discover(job)
+    matches = {(e.category, e.kind, e.mark) for e in events if isinstance(e, FileMatch)}
+    assert ("nc", "mainmark", "b1") in matches
+    assert ("pdf", "mainmark", "b1") in matches
+    assert ("enc", None, None) in matches
+
+    result = discovery.result()
+    assert result["nc"]["part"] == [f"{NC}/parts/P1.nc1"]
+    assert result["enc"] == [f"{NC}/layout.enc"]
+    # P2 only exists in an excluded archive folder
+    assert result["misses"]["nc"]["part"] == ["p2"]
+    assert result["misses"]["pdf"]["part"] == ["p1", "p2"]
+    assert result["walk_errors"] == 0
+
+
+def test_targets_limit_the_walks(job):
+    discovery, events = discover(job, targets=["PART", "ASSEMBLY"])
+    assert {e.category for e in events if isinstance(e, FileMatch)} == {"pdf"}
+    assert "nc" not in discovery.result()["misses"]
+
+
+def test_progress_events(job):
+    _, events = discover(job, progress_every=1, targets=["NC"])
+    progress = [e for e in events if isinstance(e, ScanProgress)]
+    assert progress and progress[-1].dirs_visited >= 30
+
+
+def test_first_hit_stops_the_nc_walk_with_default_targets(job):
+    full, _ = discover(job, parts=["P1"])
+    quick, _ = discover(job, parts=["P1"], first_hit=True)
+    assert quick.walk_stats.dirs_visited < full.walk_stats.dirs_visited
+    assert quick.result()["enc"] == []
+
+
+def test_unreadable_job_side_is_counted(share):
+    share.add_file(f"{NC}/B1.nc1", b"nc")
+    discovery, _ = discover(share, targets=["NC", "PART"])
+    # No drawings job folder: the PDF side could not be searched.
+    assert discovery.errors == 1
+    assert discovery.result()["walk_errors"] == 1
+
+
+def test_index_walk_matches_live_walk(job, tmp_path, monkeypatch):
+    index = FileIndex(tmp_path / "index.sqlite3")
+    monkeypatch.setattr(main_logic, "get_file_index", lambda: index)
+    live, _ = discover(job)
+    for _ in range(2):  # cold, then served from the index
+        indexed = FileDiscovery(123, ["B1"], ["P1", "P2"], use_index=True, backend=job)
+        list(indexed)
+        assert indexed.result() == live.result()
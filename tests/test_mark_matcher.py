@@ -0,0 +1,29 @@
+from model.mark_matcher import MarkMatcher, normalize
+
+
+def test_normalize_collapses_separators():
+    assert normalize("  B1__rev - 2 ") == "b1 rev 2"
+
+
+def test_match_needs_token_boundaries():
+    matcher = MarkMatcher(["B1"], [])
+    assert matcher.match("B1-rev2.pdf") == ("mainmark", "b1")
+    assert matcher.match("B10.pdf") is None
+    assert matcher.match("XB1.pdf") is None
+
+
+def test_match_prefers_left_most_then_longest_then_mainmark():
+    matcher = MarkMatcher(["B1", "P7"], ["B1-A", "P7"])
+    assert matcher.match("B1-A.nc1") == ("part", "b1-a")
+    assert matcher.match("P7 B1.pdf") == ("mainmark", "p7")
+
+
+def test_marks_with_separators_match_any_separator():
+    matcher = MarkMatcher([], ["C 12_3"])
+    assert matcher.match("c-12-3.dxf") == ("part", "c 12_3")
+
+
+def test_match_all_lists_every_mark_left_to_right():
+    matcher = MarkMatcher(["B1"], ["P2", "P3"])
+    assert matcher.match_all("P3_B1_P2.pdf") == [("part", "p3"), ("mainmark", "b1"), ("part", "p2")]
+    assert not MarkMatcher([], [])
@@ -0,0 +1,55 @@
+import pytest
+
+from model import SQL_logic
+from model.SQL_logic import (build_pkg_content_list, build_pkg_content_lists, get_pkg_contents, hydrate_job,
+                             job_needs_hydration, list_job_packages)
+
+
+@pytest.fixture
+def job(standin):
+    standin.add_package(100, "SUB#1", ["M1", "M2"], ["P1", "P2"])
+    standin.add_package(100, "SUB#2", ["M3"], ["P3"], in_ms_sql=False)
+    standin.add_package(100, "SUB#3", ["M4"], [])
+    return standin
+
+
+def test_package_contents_from_both_backends(job):
+    assert build_pkg_content_list(100, "SUB#1") == (["M1", "M2"], ["P1", "P2"])
+
+
+def test_parts_fall_back_to_mysql(job):
+    assert build_pkg_content_list(100, "SUB#2") == (["M3"], ["P3"])
+    assert build_pkg_content_list(100, "SUB#3") == (["M4"], [])
+
+
+def test_bulk_lookup_matches_single_lookups(job):
+    pairs = [(100, "sub#1"), (100, "SUB#2"), (100, "SUB#3"), (100, "SUB#9")]
+    found = build_pkg_content_lists(pairs)
+    assert found == {
+        (100, "SUB#1"): (["M1", "M2"], ["P1", "P2"]),
+        (100, "SUB#2"): (["M3"], ["P3"]),
+        (100, "SUB#3"): (["M4"], []),
+        (100, "SUB#9"): ([], []),
+    }
+
+
+def test_cached_contents_skip_sql(job, cache, monkeypatch):
+    first = get_pkg_contents(100, "SUB#1")
+    monkeypatch.setattr(SQL_logic, "build_pkg_content_list", lambda *a: pytest.fail("queried SQL"))
+    again = get_pkg_contents(100, "sub#1")
+    assert (again.mainmarks, again.parts) == (first.mainmarks, first.parts)
+
+
+def test_hydrate_job_keeps_packages_sql_server_has_no_parts_for(job, cache):
+    assert hydrate_job(100) == {"SUB#1": (["M1", "M2"], ["P1", "P2"])}
+    assert not job_needs_hydration(100)
+
+    # Looked up one by one, then part of every later hydration.
+    get_pkg_contents(100, "SUB#2", ttl=0)
+    get_pkg_contents(100, "SUB#3", ttl=0)
+    assert hydrate_job(100) == {
+        "SUB#1": (["M1", "M2"], ["P1", "P2"]),
+        "SUB#2": (["M3"], ["P3"]),
+        "SUB#3": (["M4"], []),
+    }
+    assert list_job_packages(100) == ["SUB#1", "SUB#2", "SUB#3"]
@@ -0,0 +1,21 @@
+from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot
+from model.SQL_logic import hydrate_job
+
+
+class HydrateWorker(QObject):
+    """Loads every package of a job into the package cache in the background."""
+    finished = pyqtSignal(int)
+    error = pyqtSignal(str)
+
+    def __init__(self, job_code: int):
+        super().__init__()
+        self.job_code = job_code
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            contents = hydrate_job(self.job_code)
+            self.finished.emit(len(contents))
+        except Exception as e:
+            print(f"[HydrateWorker] Job {self.job_code} not hydrated :: {e}")
+            self.error.emit(str(e))
@@ -0,0 +1,21 @@
+from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot
+from model.SQL_logic import list_job_packages
+
+
+class PackageListWorker(QObject):
+    """Loads the package names of a job for autocomplete."""
+    finished = pyqtSignal(int, list)
+    error = pyqtSignal(str)
+
+    def __init__(self, job_code: int, ttl: float):
+        super().__init__()
+        self.job_code = job_code
+        self.ttl = ttl
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            self.finished.emit(self.job_code, list_job_packages(self.job_code, self.ttl))
+        except Exception as e:
+            print(f"[PackageListWorker] Job {self.job_code} packages unavailable :: {e}")
+            self.error.emit(str(e))
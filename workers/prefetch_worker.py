@@ -0,0 +1,23 @@
+from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot
+from model.SQL_logic import get_pkg_contents
+
+
+class PrefetchWorker(QObject):
+    """Loads a package's mark lists ahead of the Scan click."""
+    finished = pyqtSignal(int, str, object)
+    error = pyqtSignal(str)
+
+    def __init__(self, job_code: int, pkg_code: str, ttl: float):
+        super().__init__()
+        self.job_code = job_code
+        self.pkg_code = pkg_code
+        self.ttl = ttl
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            contents = get_pkg_contents(self.job_code, self.pkg_code, ttl=self.ttl)
+            self.finished.emit(self.job_code, self.pkg_code, contents)
+        except Exception as e:
+            print(f"[PrefetchWorker] {self.job_code} {self.pkg_code} not prefetched :: {e}")
+            self.error.emit(str(e))
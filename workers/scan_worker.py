@@ -1,27 +1,68 @@
 from PyQt6.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
 from pathlib import Path
-from model.main_logic import sort_to_dirs
+from model.copy_engine import DEFAULT_COPY_WORKERS, CopyProgress
+from model.main_logic import FileDiscovery, ScanProgress, sort_to_dirs, sort_stream_to_dirs
+from model.settings import SETTINGS
 import traceback
 
 
 class ScanWorker(QObject):
+    msg = pyqtSignal(str)
+    progress = pyqtSignal(object)
+    report = pyqtSignal(dict, list, int)
     finished = pyqtSignal(str)
     error = pyqtSignal(str)
 
-    def __init__(self, targets: list[str], output_root: Path, files: dict, overwrite: bool = False):
+    def __init__(self, targets: list[str], output_root: Path, files: dict | None = None, overwrite: bool = False,
+                 discovery: FileDiscovery | None = None, sync: bool = False, remove_stale: bool = False,
+                 verify_hash: bool = False):
         super().__init__()
         self.targets = targets
         self.output_root = Path(output_root)
         self.files = files
         self.overwrite = overwrite
+        self.discovery = discovery
+        self.sync_options = dict(sync=sync, remove_stale=remove_stale, verify_hash=verify_hash)
+        self._copying = False
+        self.copy_workers = SETTINGS.value("copyWorkers", DEFAULT_COPY_WORKERS, type=int)
 
     @pyqtSlot()
     def run(self):
         try:
-            print("[ScanWorker] Starting sort_to_dirs...")
-            sort_to_dirs(self.targets, self.files, self.output_root, self.overwrite)
-            print("[ScanWorker] Sort complete")
-            self.finished.emit("Scan Complete")
+            if self.discovery is not None:
+                print("[ScanWorker] Starting streamed discovery + copy...")
+                result = sort_stream_to_dirs(self.targets, self.discovery, self.output_root, self.overwrite,
+                                             on_progress=self._on_progress, copy_workers=self.copy_workers,
+                                             on_copy_progress=self._on_copy_progress, **self.sync_options)
+                self.files = self.discovery.result()
+            else:
+                print("[ScanWorker] Starting sort_to_dirs...")
+                result = sort_to_dirs(self.targets, self.files, self.output_root, self.overwrite,
+                                      copy_workers=self.copy_workers, on_copy_progress=self._on_copy_progress,
+                                      **self.sync_options)
+            print(f"[ScanWorker] Sort complete: {result.summary()}")
+            self.report.emit((self.files or {}).get("misses", {}), result.failed_paths, result.walk_errors)
+            self.finished.emit(f"Scan Complete: {result.summary()}")
         except Exception as e:
             print(traceback.format_exc())
             self.error.emit(str(e))
+
+    def _on_progress(self, progress: ScanProgress):
+        if not self._copying:
+            self.msg.emit(f"Scanning… {progress.dirs_visited} folders, {progress.files_seen} files")
+
+    def _on_copy_progress(self, progress: CopyProgress):
+        self._copying = True
+        if progress.counting:
+            self.msg.emit(f"Copying {progress.files_done} files · {_mb(progress.bytes_done)} MB · "
+                          f"{_mb(progress.rate)} MB/s")
+            return
+        eta = "--:--" if progress.eta is None else f"{int(progress.eta) // 60}:{int(progress.eta) % 60:02d}"
+        self.msg.emit(f"Copying {progress.files_done}/{progress.files_total} files · "
+                      f"{_mb(progress.bytes_done)}/{_mb(progress.bytes_total)} MB · "
+                      f"{_mb(progress.rate)} MB/s · ETA {eta}")
+        self.progress.emit(progress)
+
+
+def _mb(n: float) -> str:
+    return f"{n / 1_000_000:.1f}"